@@ -0,0 +1,110 @@
+"""
+Render-time microbenchmark for SDX Agent responses
+
+Builds a corpus of large, code-heavy answers and times three ways of showing
+them: the old single `Panel`, `ResponseRenderer` on a terminal, and
+`ResponseRenderer` with piped output. Output goes to in-memory files so only
+rendering is measured.
+
+    python benchmarks/bench_render.py [--repeat 5] [--sizes 20000,100000,400000]
+"""
+
+import argparse
+import io
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rich.console import Console
+from rich.markdown import Markdown
+from rich.panel import Panel
+
+from render import ResponseRenderer
+
+PROSE = (
+    "The loader reads each entry once and keeps the decoded value in memory, so "
+    "repeated lookups during the same request do not touch the disk again. "
+)
+MARKDOWN_SNIPPETS = [
+    "## Changes\n\n- Added a cache for decoded entries\n- Removed the second pass\n- **Note:** the API is unchanged",
+    "1. Read the config\n2. Build the index\n3. Serve lookups from `self._entries`",
+    "> The function is called on every iteration, so keep it cheap.",
+]
+CODE = '''def load(path, cache={}):
+    """Load and memoize a file"""
+    if path in cache:
+        return cache[path]
+    with open(path) as f:
+        data = f.read()
+    cache[path] = data
+    return data
+'''
+
+
+def build_response(size: int, seed: int) -> str:
+    """A response of about size characters mixing prose, markdown and code"""
+    rng = random.Random(seed)
+    parts, total = [], 0
+    while total < size:
+        choice = rng.random()
+        if choice < 0.4:
+            part = PROSE * rng.randint(2, 6)
+        elif choice < 0.6:
+            part = rng.choice(MARKDOWN_SNIPPETS)
+        else:
+            part = "```python\n" + CODE * rng.randint(2, 8) + "```"
+        parts.append(part)
+        total += len(part)
+    return "\n\n".join(parts)
+
+
+def _console(terminal: bool) -> Console:
+    return Console(file=io.StringIO(), force_terminal=terminal, width=100, color_system="truecolor")
+
+
+def render_panel(text: str):
+    _console(True).print(Panel(Markdown(text), title="SDX Agent Response", padding=(1, 2)))
+
+
+def render_incremental(text: str):
+    ResponseRenderer(_console(True)).render("SDX Agent Response", text)
+
+
+def render_piped(text: str):
+    ResponseRenderer(_console(False)).render("SDX Agent Response", text)
+
+
+def time_it(fn, text: str, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(text)
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--sizes", default="20000,100000,400000")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    print(f"{'size':>9}  {'panel':>9}  {'incremental':>11}  {'piped':>9}  {'speedup':>7}")
+    for index, size in enumerate(sizes):
+        text = build_response(size, seed=index)
+        panel = time_it(render_panel, text, args.repeat)
+        incremental = time_it(render_incremental, text, args.repeat)
+        piped = time_it(render_piped, text, args.repeat)
+        print(
+            f"{len(text):>9}  {panel * 1000:>7.1f}ms  {incremental * 1000:>9.1f}ms  "
+            f"{piped * 1000:>7.2f}ms  {panel / incremental:>6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
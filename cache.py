@@ -1,7 +1,9 @@
 import json
 import hashlib
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional, Any
+from typing import Optional, Any, Dict, Tuple
 from datetime import datetime, timedelta
 
 
@@ -58,3 +60,132 @@ class CacheManager:
         """Clear all cache"""
         for f in self.cache_dir.glob("*.json"):
             f.unlink()
+
+
+class FileReadCache:
+    """In-process LRU cache of decoded file contents keyed by (path, mtime_ns, size)"""
+    
+    def __init__(self, max_bytes: int = 8 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        # path -> [(mtime_ns, size), content, loaded_by_prefetch, encoded bytes]
+        self._entries: "OrderedDict[str, list]" = OrderedDict()
+        # what the model has been shown, per conversation thread (agent loop or worker)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.prefetched = 0
+        self.prefetch_hits = 0
+        self.prefetch_wasted_bytes = 0
+    
+    @staticmethod
+    def digest(content: str) -> str:
+        """Short content hash shown to the model"""
+        return hashlib.sha1(content.encode("utf-8", "surrogatepass")).hexdigest()[:12]
+    
+    @staticmethod
+    def _key(stat_result) -> Tuple[int, int]:
+        return (stat_result.st_mtime_ns, stat_result.st_size)
+    
+    def get(self, path: str, stat_result) -> Optional[str]:
+        """Return cached content if the file is unchanged on disk"""
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None or entry[0] != self._key(stat_result):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(path)
+            self.hits += 1
+            if entry[2]:
+                entry[2] = False
+                self.prefetch_hits += 1
+            return entry[1]
+    
+    def contains(self, path: str, stat_result) -> bool:
+        """Check for a fresh entry without touching hit/miss counters or LRU order"""
+        with self._lock:
+            entry = self._entries.get(path)
+            return entry is not None and entry[0] == self._key(stat_result)
+    
+    @staticmethod
+    def _size(content: str) -> int:
+        """Bytes counted against the cap: the UTF-8 size, not the character count"""
+        return len(content.encode("utf-8", "surrogatepass"))
+    
+    def put(self, path: str, stat_result, content: str, prefetched: bool = False):
+        """Store content, evicting least recently used entries over the memory cap"""
+        size = self._size(content)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._drop(path)
+            self._entries[path] = [self._key(stat_result), content, prefetched, size]
+            self.current_bytes += size
+            if prefetched:
+                self.prefetched += 1
+            while self.current_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+    
+    def resize(self, max_bytes: int):
+        """Change the memory cap, evicting entries that no longer fit (0 disables caching)"""
+        with self._lock:
+            self.max_bytes = max_bytes
+            while self._entries and self.current_bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+    
+    def invalidate(self, path: str):
+        """Forget a path, e.g. after it was written"""
+        with self._lock:
+            self._drop(path)
+    
+    def _drop(self, path: str):
+        entry = self._entries.pop(path, None)
+        if entry is not None:
+            self.current_bytes -= entry[3]
+            if entry[2]:
+                self.prefetch_wasted_bytes += entry[3]
+    
+    def _seen(self) -> Dict[str, str]:
+        seen = getattr(self._local, "seen", None)
+        if seen is None:
+            seen = self._local.seen = {}
+        return seen
+    
+    def begin_request(self):
+        """Reset the set of files the model has seen in the current request (per thread)"""
+        self._local.seen = {}
+    
+    def previous_read(self, path: str) -> Optional[str]:
+        """Content the model was last given for path in this request"""
+        return self._seen().get(path)
+    
+    def mark_seen(self, path: str, content: str):
+        self._seen()[path] = content
+    
+    def forget_seen(self, path: str):
+        """The model no longer has path's content (its output was elided); the next read is sent in full"""
+        self._seen().pop(path, None)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+        self._local.seen = {}
+    
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "prefetched": self.prefetched,
+                "prefetch_hits": self.prefetch_hits,
+                "prefetch_wasted_bytes": self.prefetch_wasted_bytes,
+                "prefetch_pending_bytes": sum(e[3] for e in self._entries.values() if e[2]),
+            }
+
+
+file_cache = FileReadCache()
@@ -1,10 +1,19 @@
 import os
 from google.genai import types 
 from func.get_files_info import get_files_info
-from func.get_file_content import get_file_content
+from func.get_file_content import get_file_content, forget_read
 from func.write_file import write_file
 from func.run_python_file import run_python_file
+from func.query_symbols import query_symbols
+from func.run_tests import run_tests
 working_directory = "."
+
+def forget_elided(calls) :
+    """Elided file reads are gone from the model's context, so later reads must not answer with a delta"""
+    for name , args in calls :
+        if name == "get_file_content" and args.get("file_path") :
+            forget_read(working_directory , args["file_path"])
+
 def call_function(function_call_part, verbose=False):
     if verbose:
         print(f"Calling function: {function_call_part.name}({function_call_part.args})")
@@ -20,13 +29,17 @@ def call_function(function_call_part, verbose=False):
         result = run_python_file(working_directory , **function_call_part.args)
     if function_call_part.name == 'write_file':
         result = write_file(working_directory , **function_call_part.args)
+    if function_call_part.name == 'query_symbols':
+        result = query_symbols(working_directory , **function_call_part.args)
+    if function_call_part.name == 'run_tests':
+        result = run_tests(working_directory , **function_call_part.args)
     if result == "":
         return types.Content(
                 role="tool",
                 parts=[
                     types.Part.from_function_response(
                         name=function_call_part.name,
-                        response={"error": f"Unknown function: {function_name}"},
+                        response={"error": f"Unknown function: {function_call_part.name}"},
                     )
                 ],
             )
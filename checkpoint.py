@@ -0,0 +1,170 @@
+"""
+In-flight request checkpoints for SDX Agent
+
+While a request runs, every model turn and tool result is appended to
+`sessions/checkpoint_<session_id>.jsonl` as one JSON line, flushed but not
+fsynced, so a checkpoint costs one small write. The log only ever holds the
+request in flight: it is truncated when a request finishes, so a non-empty
+log left behind by a crash or Ctrl-C is exactly what `/resume` picks up.
+Records after the last completed iteration are discarded on resume.
+"""
+
+import json
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from google.genai import types
+
+CHECKPOINT_GLOB = "checkpoint_*.jsonl"
+
+
+@dataclass
+class InterruptedRequest:
+    """A request that stopped before finishing, cut at its last completed iteration"""
+    path: Path
+    user_input: str
+    started: str
+    iterations: int
+    records: List[Dict[str, Any]] = field(default_factory=list)
+
+    def contents(self):
+        """Yield (record type, record) with Content objects rebuilt"""
+        for record in self.records:
+            if "content" in record:
+                record = dict(record, content=types.Content.model_validate(record["content"]))
+            yield record["type"], record
+
+
+class CheckpointLog:
+    """Append-only log of the request currently being processed"""
+
+    def __init__(self, session_dir: str, session_id: str, enabled: bool = True):
+        self.session_dir = Path(session_dir)
+        self.path = self.session_dir / f"checkpoint_{session_id}.jsonl"
+        self.enabled = enabled
+        self._file = None
+        self.bytes_written = 0
+
+    def _write(self, record: Dict[str, Any]):
+        if not self.enabled:
+            return
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        line = json.dumps(record, separators=(",", ":"), ensure_ascii=False) + "\n"
+        self._file.write(line)
+        # reaches the OS on every record, so it survives the process dying
+        self._file.flush()
+        self.bytes_written += len(line)
+
+    @staticmethod
+    def _dump(content: types.Content) -> Dict[str, Any]:
+        return content.model_dump(mode="json", exclude_none=True)
+
+    # ------------------------------------------------------------------
+    # Recording
+    # ------------------------------------------------------------------
+
+    def begin(self, user_input: str, resumed_from: Optional[str] = None):
+        self.finish()
+        self._write({
+            "type": "begin",
+            "user_input": user_input,
+            "started": datetime.now().isoformat(),
+            "resumed_from": resumed_from,
+        })
+
+    def model_turn(self, iteration: int, content: types.Content):
+        self._write({"type": "model", "iteration": iteration, "content": self._dump(content)})
+
+    def tool_result(self, iteration: int, function_call, result: types.Content, repeated: bool = False):
+        self._write({
+            "type": "tool",
+            "iteration": iteration,
+            "name": function_call.name,
+            "args": dict(function_call.args or {}),
+            "content": self._dump(result),
+            "repeated": repeated,
+        })
+
+    def expansion(self, iteration: int, function_call):
+        self._write({
+            "type": "expansion",
+            "iteration": iteration,
+            "name": function_call.name,
+            "args": dict(function_call.args or {}),
+        })
+
+    def iteration_done(self, iteration: int):
+        self._write({"type": "iteration", "iteration": iteration})
+
+    def replay(self, interrupted: InterruptedRequest):
+        """Copy the completed part of an interrupted request into this log"""
+        for record in interrupted.records:
+            self._write(record)
+
+    def finish(self):
+        """The request ended; nothing is left to resume"""
+        if self._file is not None:
+            self._file.truncate(0)
+            self._file.seek(0)
+            self.bytes_written = 0
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self.path.exists() and self.path.stat().st_size == 0:
+            self.path.unlink()
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _load(path: Path) -> Optional[InterruptedRequest]:
+        begin, records, completed = None, [], []
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # torn last line from a crash mid-write
+                        break
+                    if record.get("type") == "begin":
+                        begin, records, completed = record, [], []
+                        continue
+                    records.append(record)
+                    if record.get("type") == "iteration":
+                        completed = list(records)
+        except OSError:
+            return None
+        if begin is None:
+            return None
+        iterations = sum(1 for record in completed if record["type"] == "iteration")
+        return InterruptedRequest(path, begin["user_input"], begin["started"], iterations, completed)
+
+    def find_interrupted(self) -> Optional[InterruptedRequest]:
+        """Most recent unfinished request from this or an earlier session"""
+        paths = sorted(
+            (path for path in self.session_dir.glob(CHECKPOINT_GLOB) if path.stat().st_size),
+            key=lambda path: path.stat().st_mtime,
+            reverse=True,
+        )
+        for path in paths:
+            interrupted = self._load(path)
+            if interrupted is not None:
+                return interrupted
+        return None
+
+    def discard(self, interrupted: InterruptedRequest):
+        """Drop an interrupted request once it has been taken over"""
+        if interrupted.path == self.path:
+            return
+        try:
+            os.remove(interrupted.path)
+        except OSError:
+            pass
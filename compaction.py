@@ -0,0 +1,267 @@
+"""
+Tool-output compaction for SDX Agent
+
+Tool results are re-sent to the model on every later iteration, so they are
+compacted before they enter the message list: repeated tracebacks and lines
+are deduplicated, long listings are summarized, oversized outputs are trimmed
+to a head and tail, and outputs older than the last few tool turns are
+replaced by short references the model can expand with `expand_tool_output`.
+"""
+
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from google.genai import types
+
+
+@dataclass
+class CompactionPolicy:
+    """Size budget for one tool's output"""
+    max_chars: int
+    head_chars: int
+    tail_chars: int
+    max_listing_entries: int = 0
+
+
+DEFAULT_POLICIES: Dict[str, CompactionPolicy] = {
+    "get_file_content": CompactionPolicy(max_chars=8000, head_chars=6000, tail_chars=1500),
+    "get_files_info": CompactionPolicy(max_chars=4000, head_chars=3000, tail_chars=500, max_listing_entries=60),
+    "run_python_file": CompactionPolicy(max_chars=4000, head_chars=1500, tail_chars=2000),
+    "default": CompactionPolicy(max_chars=6000, head_chars=4000, tail_chars=1500),
+}
+
+CHARS_PER_TOKEN = 4
+
+
+def scaled_policies(scale: float) -> Dict[str, CompactionPolicy]:
+    """DEFAULT_POLICIES with every budget multiplied by scale"""
+    return {
+        name: CompactionPolicy(
+            max_chars=int(policy.max_chars * scale),
+            head_chars=int(policy.head_chars * scale),
+            tail_chars=int(policy.tail_chars * scale),
+            max_listing_entries=int(policy.max_listing_entries * scale),
+        )
+        for name, policy in DEFAULT_POLICIES.items()
+    }
+
+_TRACEBACK_START = "Traceback (most recent call last):"
+_LISTING_LINE = re.compile(r"^- (.+?)\s+size: \d+ bytes\s+is_dir: (True|False)")
+
+schema_expand_tool_output = types.FunctionDeclaration(
+    name="expand_tool_output",
+    description="Returns the full, uncompacted text of an earlier tool output that was trimmed or replaced by a reference (ref number shown in the note).",
+    parameters=types.Schema(
+        type=types.Type.OBJECT,
+        properties={
+            "ref": types.Schema(
+                type=types.Type.INTEGER,
+                description="The reference number of the tool output to expand.",
+            ),
+        },
+        required=["ref"],
+    ),
+)
+
+
+def _collapse_repeated_lines(text: str, max_block: int = 4) -> str:
+    """Collapse consecutive repeats of the same 1..max_block line block"""
+    lines = text.split("\n")
+    out: List[str] = []
+    i = 0
+    while i < len(lines):
+        collapsed = False
+        for size in range(1, max_block + 1):
+            block = lines[i:i + size]
+            if len(block) < size:
+                break
+            repeats = 1
+            while lines[i + repeats * size:i + (repeats + 1) * size] == block:
+                repeats += 1
+            if repeats > 2:
+                out.extend(block)
+                out.append(f"[previous {size} line(s) repeated {repeats - 1} more times]")
+                i += repeats * size
+                collapsed = True
+                break
+        if not collapsed:
+            out.append(lines[i])
+            i += 1
+    return "\n".join(out)
+
+
+def _dedupe_tracebacks(text: str) -> str:
+    """Replace tracebacks identical to an earlier one in the same output"""
+    if text.count(_TRACEBACK_START) < 2:
+        return text
+    chunks = text.split(_TRACEBACK_START)
+    seen = set()
+    out = [chunks[0]]
+    for chunk in chunks[1:]:
+        if chunk in seen:
+            out.append(" [identical traceback omitted]\n")
+        else:
+            seen.add(chunk)
+            out.append(_TRACEBACK_START + chunk)
+    return "".join(out)
+
+
+def _summarize_listing(text: str, max_entries: int) -> str:
+    lines = [l for l in text.split("\n") if l.strip()]
+    if max_entries <= 0 or len(lines) <= max_entries:
+        return text
+    rest = lines[max_entries:]
+    kinds: Counter = Counter()
+    for line in rest:
+        match = _LISTING_LINE.match(line.strip())
+        if not match:
+            kinds["other"] += 1
+        elif match.group(2) == "True":
+            kinds["dirs"] += 1
+        else:
+            ext = match.group(1).rsplit(".", 1)[-1] if "." in match.group(1) else "no ext"
+            kinds[f".{ext}" if ext != "no ext" else ext] += 1
+    summary = ", ".join(f"{count} {kind}" for kind, count in kinds.most_common())
+    return "\n".join(lines[:max_entries]) + f"\n[... {len(rest)} more entries: {summary}]\n"
+
+
+def _trim(text: str, policy: CompactionPolicy) -> str:
+    if len(text) <= policy.max_chars:
+        return text
+    head_chars, tail_chars = max(policy.head_chars, 0), max(policy.tail_chars, 0)
+    omitted = len(text) - head_chars - tail_chars
+    if omitted <= 0:
+        return text
+    # text[-0:] would be the whole text, so slice from an explicit start
+    return (
+        text[:head_chars]
+        + f"\n[... {omitted} characters omitted ...]\n"
+        + text[len(text) - tail_chars:]
+    )
+
+
+class ToolOutputCompactor:
+    """Per-request compaction stage between call_function and the message list"""
+
+    def __init__(self, policies: Optional[Dict[str, CompactionPolicy]] = None, keep_recent: int = 2):
+        self.policies = dict(DEFAULT_POLICIES)
+        if policies:
+            self.policies.update(policies)
+        self.keep_recent = keep_recent
+        self._outputs: Dict[int, Tuple[str, Dict, str]] = {}
+        self._positions: List[Tuple[int, int, int]] = []  # (message index, ref, turn)
+        self._turn = 0
+        self._elided = set()  # message indexes already replaced by a reference
+        self.original_chars = 0
+        self.compacted_chars = 0
+        self.resend_chars_saved = 0
+
+    def _policy(self, name: str) -> CompactionPolicy:
+        return self.policies.get(name, self.policies["default"])
+
+    def compact_text(self, name: str, text: str) -> str:
+        policy = self._policy(name)
+        compacted = _dedupe_tracebacks(text)
+        compacted = _collapse_repeated_lines(compacted)
+        if name == "get_files_info":
+            compacted = _summarize_listing(compacted, policy.max_listing_entries)
+        return _trim(compacted, policy)
+
+    @staticmethod
+    def _response(content: types.Content) -> Optional[types.FunctionResponse]:
+        try:
+            return content.parts[0].function_response
+        except (AttributeError, IndexError, TypeError):
+            return None
+
+    def begin_turn(self, turn: int):
+        """Outputs added from now on belong to this model turn (e.g. the iteration)
+
+        All calls from one model response form a single tool turn, however many
+        there are, so they age out together.
+        """
+        self._turn = turn
+
+    def add(self, messages: List[types.Content], function_call, result: types.Content):
+        """Compact a tool result and append it to messages"""
+        response = self._response(result)
+        if response is None or "result" not in (response.response or {}):
+            messages.append(result)
+            return
+
+        text = str(response.response["result"])
+        ref = len(self._outputs) + 1
+        self._outputs[ref] = (function_call.name, dict(function_call.args or {}), text)
+        compacted = self.compact_text(function_call.name, text)
+        self.original_chars += len(text)
+        self.compacted_chars += len(compacted)
+
+        payload = {"result": compacted}
+        if compacted != text:
+            payload["note"] = (
+                f"output compacted from {len(text)} to {len(compacted)} characters; "
+                f"call expand_tool_output(ref={ref}) for the full text"
+            )
+        messages.append(types.Content(
+            role="tool",
+            parts=[types.Part.from_function_response(name=function_call.name, response=payload)],
+        ))
+        self._positions.append((len(messages) - 1, ref, self._turn))
+
+    def elide_older(self, messages: List[types.Content]) -> List[Tuple[str, Dict]]:
+        """Replace tool outputs older than the last keep_recent tool turns with references
+
+        Call before each model request; the characters not re-sent are counted.
+        Returns the (name, args) of the calls elided by this call.
+        """
+        elided = []
+        turns = sorted({turn for _, _, turn in self._positions})
+        recent = turns[-self.keep_recent:] if self.keep_recent > 0 else []
+        cutoff = recent[0] if recent else float("inf")
+        for index, ref, turn in self._positions:
+            if turn >= cutoff or index in self._elided or index >= len(messages):
+                continue
+            name, args, _ = self._outputs[ref]
+            arg_text = ", ".join(f"{k}={str(v)[:60]!r}" for k, v in args.items())
+            messages[index] = types.Content(
+                role="tool",
+                parts=[types.Part.from_function_response(
+                    name=name,
+                    response={"result": f"[earlier output of {name}({arg_text}) elided; "
+                                        f"call expand_tool_output(ref={ref}) to view it]"},
+                )],
+            )
+            self._elided.add(index)
+            elided.append((name, args))
+
+        for index, ref, _ in self._positions:
+            if index < len(messages):
+                response = self._response(messages[index])
+                sent = len(str((response.response or {}).get("result", ""))) if response else 0
+                self.resend_chars_saved += max(len(self._outputs[ref][2]) - sent, 0)
+        return elided
+
+    def add_expansion(self, messages: List[types.Content], function_call):
+        """Answer an expand_tool_output call with the full stored text"""
+        ref = (function_call.args or {}).get("ref")
+        try:
+            ref = int(ref)
+            response = {"result": self._outputs[ref][2]}
+        except (KeyError, TypeError, ValueError):
+            ref, response = None, {"error": f"Unknown tool output reference: {ref}"}
+        messages.append(types.Content(
+            role="tool",
+            parts=[types.Part.from_function_response(name=function_call.name, response=response)],
+        ))
+        if ref is not None:
+            # the expanded copy is elided again once it ages out
+            self._positions.append((len(messages) - 1, ref, self._turn))
+
+    def report(self) -> str:
+        saved = self.resend_chars_saved
+        return (
+            f"{len(self._outputs)} tool outputs, {self.original_chars} -> {self.compacted_chars} chars "
+            f"on entry; {saved} chars (~{saved // CHARS_PER_TOKEN} tokens) not re-sent to the model"
+        )
@@ -1,65 +1,259 @@
-
 MAX_CHARS = 10000
 
 """
 Configuration management for SDX Agent
 """
 
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, fields, replace
+from typing import Any, Dict, Optional
 import os
 from dotenv import load_dotenv
 
+from router import DEFAULT_RULES, FAST_ANSWER_RULES, parse_rules
+
+
+# Named performance profiles; each sets a group of related knobs together.
+# Explicit environment variables still override whatever the profile sets.
+PROFILES: Dict[str, Dict[str, Any]] = {
+    "default": {},
+    "low-latency": {
+        "model_name": "gemini-2.5-flash",
+        "fast_model_name": "gemini-2.5-flash-lite",
+        "enable_routing": True,
+        "routing_rules": FAST_ANSWER_RULES,
+        "temperature": 0.3,
+        "max_iterations": 12,
+        "max_file_chars": 6000,
+        "tool_output_scale": 0.75,
+        "compaction_keep_recent": 1,
+        "max_workers": 8,
+        "enable_prefetch": True,
+        "enable_context_cache": True,
+        "enable_caching": True,
+    },
+    "low-cost": {
+        "model_name": "gemini-2.5-flash-lite",
+        "fast_model_name": "gemini-2.5-flash-lite",
+        "enable_routing": False,
+        "routing_rules": FAST_ANSWER_RULES,
+        "max_iterations": 12,
+        "max_file_chars": 4000,
+        "tool_output_scale": 0.5,
+        "compaction_keep_recent": 1,
+        "max_workers": 2,
+        "enable_prefetch": False,
+        "enable_context_cache": True,
+        "enable_caching": True,
+    },
+    "thorough": {
+        "model_name": "gemini-2.5-pro",
+        "fast_model_name": "gemini-2.5-flash",
+        "enable_routing": True,
+        "temperature": 0.5,
+        "max_iterations": 40,
+        "timeout": 900,
+        "max_file_chars": 20000,
+        "tool_output_scale": 2.0,
+        "compaction_keep_recent": 4,
+        "max_workers": 4,
+        "enable_prefetch": True,
+        "enable_context_cache": True,
+        "enable_caching": True,
+    },
+}
+
+# environment variable -> Config field
+ENV_VARS: Dict[str, str] = {
+    "MODEL_NAME": "model_name",
+    "FAST_MODEL_NAME": "fast_model_name",
+    "ENABLE_ROUTING": "enable_routing",
+    "ROUTING_RULES": "routing_rules",
+    "TEMPERATURE": "temperature",
+    "MAX_ITERATIONS": "max_iterations",
+    "TIMEOUT": "timeout",
+    "MAX_WORKERS": "max_workers",
+    "ENABLE_CONTEXT_CACHE": "enable_context_cache",
+    "CONTEXT_CACHE_TTL": "context_cache_ttl",
+    "MAX_FILE_CHARS": "max_file_chars",
+    "TOOL_TIMEOUT": "tool_timeout",
+    "TEST_TIMEOUT": "test_timeout",
+    "MAX_TEST_SHARDS": "max_test_shards",
+    "SANDBOX_MEMORY_MB": "sandbox_memory_mb",
+    "TOOL_OUTPUT_SCALE": "tool_output_scale",
+    "COMPACTION_KEEP_RECENT": "compaction_keep_recent",
+    "ENABLE_LOOP_GUARD": "enable_loop_guard",
+    "LOOP_STALL_LIMIT": "loop_stall_limit",
+    "ENABLE_CHECKPOINTS": "enable_checkpoints",
+    "MEMORY_SAMPLER": "enable_memory_sampler",
+    "MEMORY_SAMPLE_INTERVAL": "memory_sample_interval",
+    "MEMORY_HIGH_WATER_MB": "memory_high_water_mb",
+    "MEMORY_TOP_SITES": "memory_top_sites",
+    "RECORD_TRACE": "record_trace",
+    "TRACE_DIR": "trace_dir",
+    "FILE_CACHE_MB": "file_cache_mb",
+    "ENABLE_PREFETCH": "enable_prefetch",
+    "SESSION_HOT_LIMIT": "session_hot_limit",
+    "SESSION_ARCHIVE_HOURS": "session_archive_hours",
+    "SESSION_DIR": "session_dir",
+    "LOG_DIR": "log_dir",
+    "CACHE_DIR": "cache_dir",
+    "ENABLE_LOGGING": "enable_logging",
+    "ENABLE_CACHING": "enable_caching",
+}
+
+# fields that only take effect on the next start
+RESTART_FIELDS = ("gemini_api_key", "session_dir", "log_dir", "enable_logging", "trace_dir")
+
 
 @dataclass
 class Config:
     """Central configuration"""
-    
+
     # API Configuration
     gemini_api_key: str
     model_name: str = "gemini-2.5-flash"
-    
+    fast_model_name: str = "gemini-2.5-flash-lite"
+    enable_routing: bool = True
+    routing_rules: str = DEFAULT_RULES
+    profile: str = "default"
+
     # Agent Configuration
     temperature: float = 0.7
     max_iterations: int = 20
     timeout: int = 300
-    
+    max_workers: int = 4
+    enable_context_cache: bool = True
+    context_cache_ttl: int = 3600
+    enable_loop_guard: bool = True
+    loop_stall_limit: int = 3
+    enable_checkpoints: bool = True
+
+    # Tool Configuration
+    max_file_chars: int = MAX_CHARS
+    tool_timeout: int = 30
+    test_timeout: int = 300
+    max_test_shards: int = 0  # 0 = one per CPU
+    sandbox_memory_mb: int = 1024
+    tool_output_scale: float = 1.0
+    compaction_keep_recent: int = 2
+
+    # Cache & Session Configuration
+    file_cache_mb: int = 8
+    enable_prefetch: bool = True
+    session_hot_limit: int = 200
+    session_archive_hours: float = 24.0
+
+    # Memory Configuration
+    enable_memory_sampler: bool = False
+    memory_sample_interval: int = 30
+    memory_high_water_mb: int = 1024  # 0 = no high-water relief
+    memory_top_sites: int = 10
+
     # Directory Configuration
     session_dir: str = "sessions"
     log_dir: str = "logs"
     cache_dir: str = ".cache"
-    
+    trace_dir: str = "traces"
+
     # Feature Flags
     enable_logging: bool = True
     enable_caching: bool = True
+    record_trace: bool = False
     verbose_default: bool = False
-    
+
     # UI Configuration
     theme_color: str = "#FF8C42"
     show_token_usage: bool = True
-    
+
+    def __post_init__(self):
+        # reject bad rules here, before a /config change reaches any component
+        parse_rules(self.routing_rules)
+
+    @staticmethod
+    def _cast(name: str, raw: Any) -> Any:
+        """Convert a string setting to the type of the named field"""
+        field_type = {f.name: f.type for f in fields(Config)}[name]
+        if not isinstance(raw, str):
+            return field_type(raw)
+        if field_type is bool:
+            value = raw.strip().lower()
+            if value in ("1", "true", "yes", "on"):
+                return True
+            if value in ("0", "false", "no", "off"):
+                return False
+            raise ValueError(f"Invalid value for {name}: '{raw}' (expected true or false)")
+        return field_type(raw.strip())
+
     @classmethod
-    def from_env(cls) -> 'Config':
-        """Load configuration from environment variables"""
-        load_dotenv()
-        
+    def from_env(cls, override: bool = False) -> 'Config':
+        """Load configuration from environment variables
+
+        PROFILE selects a named profile; individual variables override it.
+        """
+        load_dotenv(override=override)
+
         api_key = os.getenv("GEMINI_API_KEY")
         if not api_key:
             raise ValueError("GEMINI_API_KEY environment variable not set")
-        
-        return cls(
-            gemini_api_key=api_key,
-            model_name=os.getenv("MODEL_NAME", "gemini-2.5-flash"),
-            temperature=float(os.getenv("TEMPERATURE", 0.7)),
-            max_iterations=int(os.getenv("MAX_ITERATIONS", 20)),
-            timeout=int(os.getenv("TIMEOUT", 300)),
-            session_dir=os.getenv("SESSION_DIR", "sessions"),
-            log_dir=os.getenv("LOG_DIR", "logs"),
-            enable_logging=os.getenv("ENABLE_LOGGING", "true").lower() == "true",
-            enable_caching=os.getenv("ENABLE_CACHING", "true").lower() == "true",
+
+        return cls.for_profile(api_key, os.getenv("PROFILE", "default"))
+
+    @classmethod
+    def for_profile(cls, api_key: str, name: str) -> 'Config':
+        """Defaults, then the named profile, then explicit environment variables"""
+        if name not in PROFILES:
+            raise ValueError(f"Unknown profile '{name}'. Available: {', '.join(PROFILES)}")
+        overrides = dict(PROFILES[name])
+        overrides.update(
+            (field_name, cls._cast(field_name, os.environ[env]))
+            for env, field_name in ENV_VARS.items()
+            if os.getenv(env) is not None
         )
+        return cls(gemini_api_key=api_key, profile=name, **overrides)
+
+    def with_profile(self, name: str) -> 'Config':
+        """Config for a named profile, independent of the profile active now
+
+        Built from the defaults and the environment, so switching profiles is
+        absolute; values changed with /config set are not carried over.
+        """
+        return self.for_profile(self.gemini_api_key, name)
+
+    def with_value(self, name: str, raw: str) -> 'Config':
+        """Copy of this config with one field changed from its string form"""
+        if name not in {f.name for f in fields(self)} or name == "gemini_api_key":
+            raise ValueError(f"Unknown setting '{name}'")
+        if name == "profile":
+            raise ValueError("Use /config profile <name> to switch profiles")
+        return replace(self, **{name: self._cast(name, raw)})
+
+    def summary(self) -> str:
+        lines = []
+        for f in fields(self):
+            value = getattr(self, f.name)
+            if f.name == "gemini_api_key":
+                value = f"{value[:4]}…" if value else "(not set)"
+            lines.append(f"  {f.name:<24} {value}")
+        return "\n".join(lines)
+
+
+_active_config: Optional[Config] = None
 
 
 def get_config() -> Config:
     """Get global configuration instance"""
-    return Config.from_env()
+    global _active_config
+    if _active_config is None:
+        _active_config = Config.from_env()
+    return _active_config
+
+
+def active_config() -> Config:
+    """Configuration for tools: the active instance, or defaults when none is loaded"""
+    return _active_config if _active_config is not None else Config(gemini_api_key="")
+
+
+def set_config(config: Config):
+    """Make config the instance returned by get_config (used for hot reload)"""
+    global _active_config
+    _active_config = config
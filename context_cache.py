@@ -0,0 +1,172 @@
+"""
+Explicit context caching for SDX Agent
+
+The system prompt and tool declarations are identical on every call, so they
+are uploaded once per model as a cached content and referenced by name from
+then on. Caches are refreshed shortly before their TTL runs out. When caching
+is disabled or the API refuses (e.g. the prefix is below the minimum cacheable
+size) the agent falls back to a prebuilt inline config.
+"""
+
+import itertools
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set
+
+from google.genai import types
+
+
+class LocalCacheBackend:
+    """In-process stand-in for `client.caches`, used by tests and offline runs"""
+
+    def __init__(self):
+        self.store: Dict[str, types.CachedContent] = {}
+        self._ids = itertools.count(1)
+
+    @staticmethod
+    def _expiry(ttl: Optional[str]) -> datetime:
+        seconds = float((ttl or "3600s").rstrip("s"))
+        return datetime.now(timezone.utc) + timedelta(seconds=seconds)
+
+    def create(self, *, model: str, config=None) -> types.CachedContent:
+        now = datetime.now(timezone.utc)
+        cached = types.CachedContent(
+            name=f"cachedContents/local-{next(self._ids)}",
+            display_name=getattr(config, "display_name", None),
+            model=model,
+            create_time=now,
+            update_time=now,
+            expire_time=self._expiry(getattr(config, "ttl", None)),
+        )
+        self.store[cached.name] = cached
+        return cached
+
+    def update(self, *, name: str, config=None) -> types.CachedContent:
+        if name not in self.store:
+            raise KeyError(f"Unknown cached content: {name}")
+        cached = self.store[name].model_copy(update={
+            "update_time": datetime.now(timezone.utc),
+            "expire_time": self._expiry(getattr(config, "ttl", None)),
+        })
+        self.store[name] = cached
+        return cached
+
+    def delete(self, *, name: str, config=None):
+        self.store.pop(name, None)
+
+
+class ContextCache:
+    """Builds generation configs once and serves them backed by explicit context caches"""
+
+    def __init__(self, backend, system_instruction: str, tools: List[types.Tool],
+                 temperature: float, ttl_seconds: int = 3600, refresh_margin: int = 300,
+                 enabled: bool = True, logger=None):
+        self.backend = backend
+        self.system_instruction = system_instruction
+        self.tools = tools
+        self.temperature = temperature
+        self.ttl_seconds = ttl_seconds
+        self.refresh_margin = timedelta(seconds=min(refresh_margin, ttl_seconds // 2))
+        self.enabled = enabled
+        self.logger = logger
+
+        self.inline_config = types.GenerateContentConfig(
+            tools=tools,
+            system_instruction=system_instruction,
+            temperature=temperature,
+        )
+        self._entries: Dict[str, types.CachedContent] = {}
+        self._configs: Dict[str, types.GenerateContentConfig] = {}
+        self._unsupported: Set[str] = set()
+        self._lock = threading.Lock()
+        self.refreshes = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+
+    def _log(self, level: str, msg: str):
+        if self.logger:
+            getattr(self.logger, level)(msg)
+
+    def config_for(self, model: str) -> types.GenerateContentConfig:
+        """Generation config for model, creating or refreshing its cache as needed"""
+        if not self.enabled or model in self._unsupported:
+            return self.inline_config
+
+        with self._lock:
+            entry = self._entries.get(model)
+            try:
+                if entry is None:
+                    entry = self._create(model)
+                elif self._expires_soon(entry):
+                    entry = self._refresh(model, entry)
+            except Exception as e:
+                self._unsupported.add(model)
+                self._log("warning", f"Context caching unavailable for {model}, sending prompt inline: {e}")
+                return self.inline_config
+            return self._configs[model]
+
+    def _expires_soon(self, entry: types.CachedContent) -> bool:
+        if entry.expire_time is None:
+            return False
+        return entry.expire_time - datetime.now(timezone.utc) <= self.refresh_margin
+
+    def _create(self, model: str) -> types.CachedContent:
+        entry = self.backend.create(
+            model=model,
+            config=types.CreateCachedContentConfig(
+                display_name="sdx-agent-static-prefix",
+                system_instruction=self.system_instruction,
+                tools=self.tools,
+                ttl=f"{self.ttl_seconds}s",
+            ),
+        )
+        self._entries[model] = entry
+        self._configs[model] = types.GenerateContentConfig(
+            cached_content=entry.name,
+            temperature=self.temperature,
+        )
+        self._log("info", f"Created context cache {entry.name} for {model}")
+        return entry
+
+    def _refresh(self, model: str, entry: types.CachedContent) -> types.CachedContent:
+        try:
+            entry = self.backend.update(
+                name=entry.name,
+                config=types.UpdateCachedContentConfig(ttl=f"{self.ttl_seconds}s"),
+            )
+            self._entries[model] = entry
+        except Exception:
+            # the cache may already be gone server-side; start over
+            entry = self._create(model)
+        self.refreshes += 1
+        return entry
+
+    def record_usage(self, usage):
+        if usage is None:
+            return
+        with self._lock:
+            self.prompt_tokens += usage.prompt_token_count or 0
+            self.cached_tokens += usage.cached_content_token_count or 0
+
+    def report(self) -> str:
+        if not self.enabled:
+            return "Context caching disabled."
+        share = (self.cached_tokens / self.prompt_tokens * 100) if self.prompt_tokens else 0.0
+        caches = ", ".join(f"{m}={e.name}" for m, e in self._entries.items()) or "none"
+        inline = ", ".join(sorted(self._unsupported)) or "none"
+        return (
+            f"Caches: {caches}\n"
+            f"Inline fallback: {inline}\n"
+            f"Cached prompt tokens: {self.cached_tokens}/{self.prompt_tokens} ({share:.0f}%), "
+            f"refreshes: {self.refreshes}"
+        )
+
+    def close(self):
+        """Delete caches created by this process"""
+        for entry in self._entries.values():
+            try:
+                self.backend.delete(name=entry.name)
+            except Exception:
+                pass
+        self._entries.clear()
+        self._configs.clear()
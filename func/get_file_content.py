@@ -1,29 +1,87 @@
-import os 
-from config import MAX_CHARS
+import os
+import difflib
+from config import active_config
+from cache import file_cache
+from func.sniff import sniff_file, describe_binary
 from google.genai import types
 
 
+def _read_file(abs_file_path , file_path , encoding) :
+    with open(abs_file_path , "r" , encoding=encoding , errors="replace") as f :
+        max_chars = active_config().max_file_chars
+        file_content_string = f.read(max_chars)
+        if len(file_content_string) == max_chars :
+             file_content_string += f"[...File truencated {file_path} at {max_chars} characters]"
+    return file_content_string
+
+
+def warm_file_cache(abs_file_path , file_path) :
+    """Load a text file into the read cache ahead of time, returns characters cached"""
+    stat_result = os.stat(abs_file_path)
+    if file_cache.contains(abs_file_path , stat_result) :
+        return 0
+    kind = sniff_file(abs_file_path , stat_result)
+    if kind.is_binary :
+        return 0
+    file_content_string = _read_file(abs_file_path , file_path , kind.encoding)
+    file_cache.put(abs_file_path , stat_result , file_content_string , prefetched=True)
+    return len(file_content_string)
+
+
+def forget_read(working_directory , file_path) :
+    """Send file_path in full on its next read, e.g. after its earlier output left the context"""
+    file_cache.forget_seen(os.path.abspath(os.path.join(working_directory , file_path)))
+
+
+def _delta_response(file_path , previous , current) :
+    old_hash = file_cache.digest(previous)
+    new_hash = file_cache.digest(current)
+    if previous == current :
+        return f'File {file_path} unchanged since previous read (hash {new_hash})'
+    diff = "".join(difflib.unified_diff(
+        previous.splitlines(keepends=True),
+        current.splitlines(keepends=True),
+        fromfile=f'{file_path}@{old_hash}',
+        tofile=f'{file_path}@{new_hash}',
+    ))
+    # a diff is only worth sending when it is smaller than the file itself
+    if len(diff) >= len(current) :
+        return None
+    return f'File {file_path} changed since previous read (hash {old_hash} -> {new_hash}):\n{diff}'
+
+
 def get_file_content( working_directory , file_path) :
     abs_working_dir = os.path.abspath(working_directory)
     abs_file_path = os.path.abspath(os.path.join(working_directory ,  file_path) )
     if not abs_file_path.startswith(abs_working_dir):
         return f'Error : {file_path} Access denied'
-    if not os.path.isfile(abs_file_path) : 
-        return f'Error : file {file_path} not allowed ' 
+    if not os.path.isfile(abs_file_path) :
+        return f'Error : file {file_path} not allowed '
     file_content_string = ""
     try:
-        with open(abs_file_path , "r") as f : 
-            file_content_string = f.read(MAX_CHARS)
-            if len(file_content_string) == MAX_CHARS : 
-                 file_content_string += f"[...File truencated {file_path} at 10000 characters]" 
-        return file_content_string
+        stat_result = os.stat(abs_file_path)
+        file_content_string = file_cache.get(abs_file_path , stat_result)
+        if file_content_string is None :
+            kind = sniff_file(abs_file_path , stat_result)
+            if kind.is_binary :
+                return describe_binary(abs_file_path , file_path , kind , stat_result.st_size)
+            file_content_string = _read_file(abs_file_path , file_path , kind.encoding)
+            file_cache.put(abs_file_path , stat_result , file_content_string)
     except Exception as e :
         return f'exception reading file : {e}'
 
+    previous = file_cache.previous_read(abs_file_path)
+    file_cache.mark_seen(abs_file_path , file_content_string)
+    if previous is not None :
+        delta = _delta_response(file_path , previous , file_content_string)
+        if delta is not None :
+            return delta
+    return file_content_string
+
 
 schema_get_file_content = types.FunctionDeclaration(
     name="get_file_content",
-    description="gets the content of the given file as string, constrained to the working directory.",
+    description="gets the content of the given file as string, constrained to the working directory. If the file was already read earlier in the same request, returns a short 'unchanged' note or a unified diff against the previous read instead of the full content. Binary files return a short description and hex preview.",
     parameters=types.Schema(
         type=types.Type.OBJECT,
         properties={
@@ -33,4 +91,4 @@ schema_get_file_content = types.FunctionDeclaration(
             ),
         },
     ),
-)
\ No newline at end of file
+)
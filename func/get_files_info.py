@@ -1,9 +1,11 @@
 import os 
+import stat
 from google.genai import types
+from func.sniff import sniff_file
 
 schema_get_files_info = types.FunctionDeclaration(
     name="get_files_info",
-    description="Lists files in the specified directory along with their sizes, constrained to the working directory.",
+    description="Lists files in the specified directory along with their sizes and whether each file is text or binary (binary files cannot be read as text), constrained to the working directory.",
     parameters=types.Schema(
         type=types.Type.OBJECT,
         properties={
@@ -15,6 +17,15 @@ schema_get_files_info = types.FunctionDeclaration(
     ),
 )
 
+def _file_kind(content_path , stat_result) :
+    # fifos, sockets and devices are never opened: reading a fifo blocks forever
+    if not stat.S_ISREG(stat_result.st_mode) :
+        return "special"
+    try :
+        return "binary" if sniff_file(content_path , stat_result).is_binary else "text"
+    except OSError :
+        return "unknown"
+
 def get_files_info(working_directory :str , directory=".") :
     abs_working_dir = os.path.abspath(working_directory)
     abs_directory = os.path.abspath(os.path.join(working_directory ,  directory) )
@@ -25,9 +36,11 @@ def get_files_info(working_directory :str , directory=".") :
     contents = os.listdir(abs_directory)
     for content in contents :
         content_path = os.path.join(abs_directory, content)
-        isdir = os.path.isdir(content_path)
-        size = os.path.getsize(content_path)
-        final_responce += f'- {content:<15} size: {size} bytes  is_dir: {isdir}\n'
+        stat_result = os.stat(content_path)
+        isdir = stat.S_ISDIR(stat_result.st_mode)
+        size = stat_result.st_size
+        kind = "dir" if isdir else _file_kind(content_path , stat_result)
+        final_responce += f'- {content:<15} size: {size} bytes  is_dir: {isdir}  type: {kind}\n'
     return final_responce 
 
 
@@ -0,0 +1,77 @@
+import os
+from google.genai import types
+from symbol_index import get_index
+
+MAX_RESULTS = 50
+
+
+def _limit(lines , total) :
+    if total > len(lines) :
+        lines.append(f'[... {total - len(lines)} more results not shown]')
+    return "\n".join(lines)
+
+
+def query_symbols(working_directory , action , name=None , file_path=None) :
+    abs_working_dir = os.path.abspath(working_directory)
+    index = get_index(abs_working_dir)
+
+    if action == "outline" :
+        if not file_path :
+            return 'Error : outline requires file_path'
+        abs_file_path = os.path.abspath(os.path.join(working_directory , file_path))
+        if not abs_file_path.startswith(abs_working_dir):
+            return f'Error : {file_path} Access denied'
+        record = index.outline(file_path)
+        if record is None :
+            return f'Error : {file_path} is not an indexed python file'
+        lines = [f'{file_path}:']
+        for module , imported , alias , line in record["imports"] :
+            statement = f'from {module} import {imported}' if imported else f'import {module}'
+            lines.append(f'  {line:>5}  {statement}' + (f' as {alias}' if alias else ''))
+        for sym_name , kind , line , qualname , signature in record["defs"] :
+            indent = "  " * qualname.count(".")
+            lines.append(f'  {line:>5}  {indent}{signature or sym_name}')
+        return "\n".join(lines)
+
+    if not name :
+        return f'Error : {action} requires name'
+
+    if action == "find_definition" :
+        matches = index.find_definition(name)
+        if not matches :
+            return f'No definition found for {name}'
+        lines = [f'{rel}:{d[2]}  {d[1]} {d[3]}  {d[4]}'.rstrip() for rel , d in matches[:MAX_RESULTS]]
+        return _limit(lines , len(matches))
+
+    if action == "find_references" :
+        matches = index.find_references(name)
+        if not matches :
+            return f'No references found for {name}'
+        lines = [f'{rel}:{line}' for rel , line in matches[:MAX_RESULTS]]
+        return _limit(lines , len(matches))
+
+    return f'Error : unknown action {action}, expected find_definition, find_references or outline'
+
+
+schema_query_symbols = types.FunctionDeclaration(
+    name="query_symbols",
+    description="Looks up Python symbols using a persistent AST index of the working directory. Much cheaper than reading whole files: use it to find where a function, class or variable is defined or used, or to get a file's outline (imports, classes, functions with signatures).",
+    parameters=types.Schema(
+        type=types.Type.OBJECT,
+        properties={
+            "action": types.Schema(
+                type=types.Type.STRING,
+                description="One of: find_definition, find_references, outline.",
+            ),
+            "name": types.Schema(
+                type=types.Type.STRING,
+                description="Symbol name for find_definition/find_references, optionally dotted (e.g. SDXAgent.process_request).",
+            ),
+            "file_path": types.Schema(
+                type=types.Type.STRING,
+                description="Python file to outline, relative to the working directory.",
+            ),
+        },
+        required=["action"],
+    ),
+)
@@ -1,6 +1,8 @@
 import os
 import subprocess 
 from google.genai import types
+from func.sandbox import limited_command, Scratch
+from config import active_config
 
 def run_python_file(working_directory , file_path: str , args=[]) : 
     abs_working_dir = os.path.abspath(working_directory)
@@ -14,12 +16,15 @@ def run_python_file(working_directory , file_path: str , args=[]) :
     try :
         final_args = ['python3' , file_path ]
         final_args.extend(args) 
-        output = subprocess.run(
-            final_args,
-            timeout=30 ,
-            capture_output=True,
-            cwd=abs_working_dir
-            )
+        timeout = active_config().tool_timeout
+        with Scratch() as scratch :
+            output = subprocess.run(
+                limited_command(final_args , cpu_seconds=timeout),
+                timeout=timeout ,
+                capture_output=True,
+                cwd=abs_working_dir,
+                env=scratch.env(),
+                )
         final_string = f'''
         STDOUT : {output.stdout}
         STDERR : {output.stderr}
@@ -29,12 +34,14 @@ def run_python_file(working_directory , file_path: str , args=[]) :
         if output.returncode != 0:
             final_string += f'process_exited with the code {output.returncode}'
         return final_string
+    except subprocess.TimeoutExpired :
+        return f'Error : {file_path} timed out after {timeout} seconds'
     except Exception as e:
         return f'Error : excuting python file  {file_path}  '        
 
 schema_run_python_file = types.FunctionDeclaration(
     name="run_python_file",
-    description="runs a python file with python3 interpreter. accepts additional cli args as an onpptional array.",
+    description="runs a python file with python3 interpreter in a sandbox (CPU, memory and file-size limits, private temp dir). accepts additional cli args as an onpptional array.",
     parameters=types.Schema(
         type=types.Type.OBJECT,
         properties={
@@ -0,0 +1,171 @@
+import os
+import re
+import sys
+import time
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from google.genai import types
+from func.sandbox import limited_command, Scratch
+from config import active_config
+
+MAX_FAILURES_SHOWN = 20
+
+_SUMMARY_COUNT = re.compile(r"(\d+) (passed|failed|errors?|skipped|xfailed|xpassed|deselected)")
+# node ids may contain spaces inside the parametrize brackets, e.g. test_p[a b]
+_FAILURE_LINE = re.compile(r"^(FAILED|ERROR) ([^\s\[]+(?:\[[^\]]*\])?)(?: - (.*))?$")
+# 0 all passed, 1 tests failed, 5 nothing to collect; 2-4 (interrupted, internal
+# or usage error) and anything else mean the shard's results are not complete
+_COMPLETE_EXITS = (0 , 1 , 5)
+
+# last failing node ids per working directory, for failed_only re-runs
+_last_failures = {}
+
+
+def _collect_test_files(abs_working_dir , target) :
+    abs_target = os.path.abspath(os.path.join(abs_working_dir , target))
+    if os.path.isfile(abs_target) :
+        return [target]
+    found = []
+    for dirpath , dirnames , filenames in os.walk(abs_target) :
+        dirnames[:] = [d for d in dirnames if not d.startswith(".") and d not in ("__pycache__" , "venv" , "node_modules")]
+        for filename in filenames :
+            if filename.endswith(".py") and (filename.startswith("test_") or filename.endswith("_test.py")) :
+                found.append(os.path.relpath(os.path.join(dirpath , filename) , abs_working_dir))
+    return sorted(found)
+
+
+def _shard(items , abs_working_dir , shards) :
+    """Greedy size-balanced split of test files into shards"""
+    def weight(item) :
+        try :
+            return os.path.getsize(os.path.join(abs_working_dir , item.split("::")[0]))
+        except OSError :
+            return 0
+    buckets = [[0 , []] for _ in range(shards)]
+    for item in sorted(items , key=weight , reverse=True) :
+        bucket = min(buckets , key=lambda b : b[0])
+        bucket[0] += weight(item) or 1
+        bucket[1].append(item)
+    return [b[1] for b in buckets if b[1]]
+
+
+def _run_shard(abs_working_dir , items) :
+    shard_timeout = active_config().test_timeout
+    with Scratch(prefix="sdx_pytest_") as scratch :
+        cmd = [
+            sys.executable , "-m" , "pytest" , "-q" , "-rfE" , "--no-header" ,
+            # a broken file must not hide the results of the rest of the shard
+            "--continue-on-collection-errors" ,
+            "-p" , "no:cacheprovider" , "--basetemp" , os.path.join(scratch.path , "basetemp") ,
+        ] + items
+        try :
+            output = subprocess.run(
+                limited_command(cmd , cpu_seconds=shard_timeout) ,
+                cwd=abs_working_dir ,
+                env=scratch.env() ,
+                capture_output=True ,
+                text=True ,
+                timeout=shard_timeout ,
+            )
+            return output.returncode , output.stdout + output.stderr
+        except subprocess.TimeoutExpired :
+            return None , f"shard timed out after {shard_timeout} seconds"
+
+
+def _parse(output) :
+    counts = {}
+    failures = []
+    for line in output.splitlines() :
+        match = _FAILURE_LINE.match(line.strip())
+        if match :
+            failures.append((match.group(1) , match.group(2) , (match.group(3) or "")[:200]))
+    summary = [l for l in output.splitlines() if " in " in l and _SUMMARY_COUNT.search(l)]
+    if summary :
+        for number , kind in _SUMMARY_COUNT.findall(summary[-1]) :
+            kind = "errors" if kind.startswith("error") else kind
+            counts[kind] = counts.get(kind , 0) + int(number)
+    return counts , failures
+
+
+def run_tests(working_directory , targets=None , failed_only=False , shards=None) :
+    abs_working_dir = os.path.abspath(working_directory)
+    if failed_only :
+        items = list(_last_failures.get(abs_working_dir , []))
+        if not items :
+            return 'No failed tests recorded from a previous run'
+    else :
+        items = []
+        for target in targets or ["."] :
+            abs_target = os.path.abspath(os.path.join(abs_working_dir , target.split("::")[0]))
+            if not abs_target.startswith(abs_working_dir) :
+                return f'Error : {target} Access denied'
+            if not os.path.exists(abs_target) :
+                return f'Error : {target} not found'
+            items.extend([target] if "::" in target else _collect_test_files(abs_working_dir , target))
+        if not items :
+            return 'No test files found (expected test_*.py or *_test.py)'
+
+    max_shards = active_config().max_test_shards or os.cpu_count() or 2
+    shard_count = max(1 , min(int(shards or max_shards) , max_shards , len(items)))
+    groups = _shard(items , abs_working_dir , shard_count)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(groups)) as pool :
+        results = list(pool.map(lambda group : _run_shard(abs_working_dir , group) , groups))
+    elapsed = time.perf_counter() - started
+
+    totals = {}
+    failures = []
+    incomplete = []
+    rerun = []
+    for index , (group , (returncode , output)) in enumerate(zip(groups , results) , 1) :
+        counts , shard_failures = _parse(output)
+        for kind , number in counts.items() :
+            totals[kind] = totals.get(kind , 0) + number
+        failures.extend(shard_failures)
+        rerun.extend(node for _ , node , _ in shard_failures)
+        if returncode not in _COMPLETE_EXITS :
+            tail = "\n".join(output.strip().splitlines()[-15:])
+            status = "timed out" if returncode is None else f'exit {returncode}'
+            incomplete.append(f'shard {index} incomplete ({status}, {len(group)} item(s)):\n{tail}')
+            # results for these items are unknown, so failed_only runs them again
+            rerun.extend(group)
+
+    _last_failures[abs_working_dir] = list(dict.fromkeys(rerun))
+
+    counts_text = ", ".join(f'{number} {kind}' for kind , number in sorted(totals.items())) or "no tests ran"
+    shards_text = f'{len(groups)} shard(s)' + (f', {len(incomplete)} incomplete' if incomplete else '')
+    lines = [f'pytest: {counts_text} in {elapsed:.1f}s across {shards_text}']
+    for kind , node , message in failures[:MAX_FAILURES_SHOWN] :
+        lines.append(f'{kind} {node}' + (f' - {message}' if message else ''))
+    if len(failures) > MAX_FAILURES_SHOWN :
+        lines.append(f'[... {len(failures) - MAX_FAILURES_SHOWN} more failures]')
+    if failures or incomplete :
+        lines.append('Call run_tests with failed_only=true to re-run just the failures.')
+    lines.extend(incomplete)
+    return "\n".join(lines)
+
+
+schema_run_tests = types.FunctionDeclaration(
+    name="run_tests",
+    description="Runs pytest on test files or node ids, sharded across parallel sandboxed processes (CPU, memory and file-size limits, private temp dir). Returns a compact pass/fail summary with failing test ids instead of raw output. Prefer this over run_python_file for validating code.",
+    parameters=types.Schema(
+        type=types.Type.OBJECT,
+        properties={
+            "targets": types.Schema(
+                type=types.Type.ARRAY,
+                description="Test files, directories or pytest node ids relative to the working directory. Defaults to the whole working directory.",
+                items=types.Schema(
+                    type=types.Type.STRING,
+                ),
+            ),
+            "failed_only": types.Schema(
+                type=types.Type.BOOLEAN,
+                description="Re-run only the tests that failed in the previous run_tests call.",
+            ),
+            "shards": types.Schema(
+                type=types.Type.INTEGER,
+                description="Maximum number of parallel pytest processes (defaults to the CPU count).",
+            ),
+        },
+    ),
+)
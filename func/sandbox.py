@@ -0,0 +1,61 @@
+import os
+import sys
+import shutil
+import tempfile
+from config import active_config
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+DEFAULT_CPU_SECONDS = 60
+DEFAULT_FILE_SIZE_MB = 64
+
+
+# runs in the child: set the limits, then exec the real command (limits survive exec)
+_LIMIT_SCRIPT = """
+import os, resource, sys
+for kind, value in zip(("RLIMIT_CPU", "RLIMIT_AS", "RLIMIT_FSIZE"), sys.argv[1:4]):
+    value = int(value)
+    if value:
+        try:
+            resource.setrlimit(getattr(resource, kind), (value, value))
+        except (ValueError, OSError):
+            pass
+os.execvp(sys.argv[4], sys.argv[4:])
+"""
+
+
+def limited_command(cmd , cpu_seconds=DEFAULT_CPU_SECONDS , memory_mb=None , file_size_mb=DEFAULT_FILE_SIZE_MB) :
+    """Wrap cmd so the child caps its CPU time, address space and written file size
+
+    The limits are applied by a small launcher process rather than a preexec_fn,
+    which is not safe to use while the agent has other threads running.
+    """
+    if resource is None :
+        return list(cmd)
+    if memory_mb is None :
+        memory_mb = active_config().sandbox_memory_mb
+    limits = [cpu_seconds or 0 , (memory_mb or 0) * 1024 * 1024 , (file_size_mb or 0) * 1024 * 1024]
+    return [sys.executable , "-S" , "-c" , _LIMIT_SCRIPT] + [str(int(value)) for value in limits] + list(cmd)
+
+
+class Scratch :
+    """Temporary directory handed to a sandboxed run as TMPDIR, removed afterwards"""
+
+    def __init__(self , prefix="sdx_") :
+        self.prefix = prefix
+        self.path = None
+
+    def env(self) :
+        env = dict(os.environ)
+        env["TMPDIR"] = env["TEMP"] = env["TMP"] = self.path
+        return env
+
+    def __enter__(self) :
+        self.path = tempfile.mkdtemp(prefix=self.prefix)
+        return self
+
+    def __exit__(self , exc_type , exc_val , exc_tb) :
+        shutil.rmtree(self.path , ignore_errors=True)
@@ -0,0 +1,114 @@
+import os
+import stat
+import errno
+import codecs
+import threading
+from collections import OrderedDict
+
+SNIFF_BYTES = 8192
+HEX_PREVIEW_BYTES = 64
+_MAX_CACHED = 4096
+
+_BOMS = [
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+
+_MAGIC = [
+    (b"\x89PNG\r\n\x1a\n", "PNG image"),
+    (b"\xff\xd8\xff", "JPEG image"),
+    (b"GIF87a", "GIF image"),
+    (b"GIF89a", "GIF image"),
+    (b"%PDF", "PDF document"),
+    (b"PK\x03\x04", "ZIP archive"),
+    (b"\x1f\x8b", "gzip archive"),
+    (b"\x7fELF", "ELF executable"),
+    (b"MZ", "Windows executable"),
+    (b"SQLite format 3\x00", "SQLite database"),
+]
+
+# bytes that never show up in ordinary text (everything below 0x20 except \t \n \f \r and ESC)
+_CONTROL = bytes(set(range(32)) - {8, 9, 10, 12, 13, 27})
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+class FileKind:
+    """Result of sniffing the head of a file"""
+
+    __slots__ = ("is_binary", "encoding", "description")
+
+    def __init__(self, is_binary, encoding=None, description="data"):
+        self.is_binary = is_binary
+        self.encoding = encoding
+        self.description = description
+
+
+def _classify(head):
+    for bom, encoding in _BOMS:
+        if head.startswith(bom):
+            return FileKind(False, encoding, "text")
+    for magic, description in _MAGIC:
+        if head.startswith(magic):
+            return FileKind(True, None, description)
+    if not head:
+        return FileKind(False, "utf-8", "empty")
+    if b"\x00" in head:
+        return FileKind(True)
+    try:
+        # final=False so a multi-byte character cut at the sniff boundary is not an error
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+        return FileKind(False, "utf-8", "text")
+    except UnicodeDecodeError:
+        pass
+    if len(head.translate(None, _CONTROL)) < len(head) * 0.9:
+        return FileKind(True)
+    return FileKind(False, "latin-1", "text")
+
+
+def sniff_file(abs_file_path, stat_result=None):
+    """Detect binary vs text (and the text encoding) from the first few KB of a file.
+
+    Results are cached per path and invalidated when mtime or size change.
+    Only regular files are read; anything else raises OSError (opening a fifo
+    would block).
+    """
+    if stat_result is None:
+        stat_result = os.stat(abs_file_path)
+    if not stat.S_ISREG(stat_result.st_mode):
+        raise OSError(errno.EINVAL, "Not a regular file", abs_file_path)
+    key = (stat_result.st_mtime_ns, stat_result.st_size)
+    with _lock:
+        cached = _cache.get(abs_file_path)
+        if cached is not None and cached[0] == key:
+            _cache.move_to_end(abs_file_path)
+            return cached[1]
+    with open(abs_file_path, "rb") as f:
+        head = f.read(SNIFF_BYTES)
+    kind = _classify(head)
+    with _lock:
+        _cache[abs_file_path] = (key, kind)
+        if len(_cache) > _MAX_CACHED:
+            _cache.popitem(last=False)
+    return kind
+
+
+def describe_binary(abs_file_path, file_path, kind, size):
+    """Compact metadata and hex preview returned instead of undecodable content"""
+    with open(abs_file_path, "rb") as f:
+        head = f.read(HEX_PREVIEW_BYTES)
+    lines = []
+    for offset in range(0, len(head), 16):
+        chunk = head[offset:offset + 16]
+        hex_part = " ".join(f"{b:02x}" for b in chunk)
+        text_part = "".join(chr(b) if 32 <= b < 127 else "." for b in chunk)
+        lines.append(f"{offset:08x}  {hex_part:<47}  {text_part}")
+    preview = "\n".join(lines)
+    return (
+        f"Binary file {file_path} ({kind.description}, {size} bytes) - content not shown.\n"
+        f"Hex preview of first {len(head)} bytes:\n{preview}"
+    )
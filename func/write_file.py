@@ -1,4 +1,5 @@
 import os
+from cache import file_cache
 from google.genai import types
 
 
@@ -28,6 +29,7 @@ def write_file(working_directory , file_path , content) :
         # يجب استخدام abs_file_path لضمان الكتابة للمسار الذي تم التحقق منه وتجهيزه
         with open(abs_file_path,"w") as f: 
             f.write(content)
+        file_cache.invalidate(abs_file_path)
         return f"Successfuly wrote to '{file_path}' ({len(content)} characters written)"
     except Exception as e :
         # تم تغيير اسم المتغير الخطأ من 'path_file' إلى 'abs_file_path'
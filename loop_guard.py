@@ -0,0 +1,158 @@
+"""
+Loop detection for the SDX Agent iteration loop
+
+Every tool call is fingerprinted by name and arguments, and every result by a
+short hash. A call repeated while nothing has been written since is answered
+from the recorded result with a hint instead of being executed again. When
+several iterations in a row make no progress (only repeated calls, or the
+same results as before), the loop is stopped with a diagnostic.
+"""
+
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+# calls that change the workspace; results recorded before them go stale
+MUTATING_TOOLS = ("write_file",)
+# calls that may change the workspace as a side effect; never answered from a record
+SIDE_EFFECT_TOOLS = ("run_python_file",)
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8", "surrogatepass")).hexdigest()[:12]
+
+
+def call_fingerprint(name: str, args: Optional[Dict]) -> str:
+    return _digest(name + json.dumps(args or {}, sort_keys=True, default=str))
+
+
+@dataclass
+class CallRecord:
+    """First execution of one call in one workspace state"""
+    iteration: int
+    result: str
+    repeats: int = 0
+
+
+class LoopDetector:
+    """Spots repeated tool calls and non-progress across iterations of one request"""
+
+    def __init__(self, stall_limit: int = 3, enabled: bool = True):
+        self.stall_limit = stall_limit
+        self.enabled = enabled
+        # totals across requests, for /stats
+        self.repeats_served = 0
+        self.early_stops = 0
+        self.iterations_saved = 0
+        self.reset()
+
+    def reset(self):
+        """Forget the previous request"""
+        self.iteration = 0
+        # bumped by every workspace-changing call
+        self.epoch = 0
+        self._calls: Dict[Tuple[str, int], CallRecord] = {}
+        # (call fingerprint, result hash) pairs seen in any epoch
+        self._outcomes: Dict[Tuple[str, str], int] = {}
+        self._writes: Dict[str, str] = {}
+        self._progress = False
+        self._had_calls = False
+        self._stalled = 0
+        self._stalled_calls: List[str] = []
+
+    # ------------------------------------------------------------------
+    # Per-call hooks
+    # ------------------------------------------------------------------
+
+    def begin_iteration(self, iteration: int):
+        self.iteration = iteration
+        self._progress = False
+        self._had_calls = False
+
+    def lookup(self, name: str, args: Optional[Dict]) -> Optional[str]:
+        """Recorded result text with a hint if this exact call already ran in this state"""
+        self._had_calls = True
+        if not self.enabled or name in MUTATING_TOOLS:
+            return None
+        record = self._calls.get((call_fingerprint(name, args), self.epoch))
+        if record is None:
+            return None
+        record.repeats += 1
+        self.repeats_served += 1
+        self._stalled_calls.append(self._describe(name, args))
+        return (
+            f"[You already called {name} with these arguments in iteration {record.iteration + 1} "
+            f"and no files have been written since, so this is the same result. "
+            f"Use it, or try a different approach.]\n{record.result}"
+        )
+
+    def record(self, name: str, args: Optional[Dict], result: str):
+        """Remember a freshly executed call and whether it moved the task forward"""
+        self._had_calls = True
+        fingerprint = call_fingerprint(name, args)
+        outcome = (fingerprint, _digest(result))
+
+        if name in MUTATING_TOOLS:
+            target = str((args or {}).get("file_path", fingerprint))
+            content = _digest(json.dumps(args or {}, sort_keys=True, default=str))
+            if self._writes.get(target) != content:
+                self._writes[target] = content
+                self.epoch += 1
+                self._progress = True
+            else:
+                self._stalled_calls.append(self._describe(name, args))
+            return
+
+        self._calls[(fingerprint, self.epoch)] = CallRecord(self.iteration, result)
+        if outcome in self._outcomes:
+            # same call, same answer as in an earlier state (e.g. the same error after an edit)
+            self._stalled_calls.append(self._describe(name, args))
+        else:
+            self._progress = True
+        self._outcomes[outcome] = self.iteration
+        if name in SIDE_EFFECT_TOOLS:
+            self.epoch += 1
+
+    def end_iteration(self) -> Optional[str]:
+        """Diagnostic text when the loop should stop for lack of progress"""
+        if not self.enabled or not self._had_calls:
+            return None
+        if self._progress:
+            self._stalled = 0
+            self._stalled_calls = []
+            return None
+        self._stalled += 1
+        if self._stalled < self.stall_limit:
+            return None
+        repeated = list(dict.fromkeys(self._stalled_calls))
+        return (
+            f"No progress in the last {self._stalled} iterations: the model kept repeating "
+            f"calls that returned results it had already seen.\n"
+            + "\n".join(f"  - {call}" for call in repeated[:8])
+        )
+
+    def held_bytes(self) -> int:
+        """Characters of recorded results kept for the current request"""
+        return sum(len(record.result) for record in self._calls.values())
+
+    def stopped_early(self, iterations_left: int):
+        self.early_stops += 1
+        self.iterations_saved += iterations_left
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _describe(name: str, args: Optional[Dict]) -> str:
+        text = ", ".join(f"{key}={value!r}" for key, value in (args or {}).items())
+        if len(text) > 80:
+            text = text[:77] + "..."
+        return f"{name}({text})"
+
+    def report(self) -> str:
+        return (
+            f"Repeated calls answered from earlier results: {self.repeats_served}\n"
+            f"Early stops: {self.early_stops}, iterations saved: {self.iterations_saved}"
+        )
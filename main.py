@@ -1,3 +1,4 @@
+import gc
 import os
 import sys
 import json
@@ -6,7 +7,7 @@ import threading
 import time
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Callable, Iterator
 from dotenv import load_dotenv
 
 from google import genai
@@ -16,7 +17,25 @@ from func.get_files_info import schema_get_files_info
 from func.get_file_content import schema_get_file_content
 from func.write_file import schema_write_file
 from func.run_python_file import schema_run_python_file
-from call_function import call_function
+from func.query_symbols import schema_query_symbols
+from func.run_tests import schema_run_tests
+from call_function import call_function, forget_elided
+from cache import file_cache
+from prefetch import Prefetcher
+from loop_guard import LoopDetector
+from render import ResponseRenderer
+from checkpoint import CheckpointLog, InterruptedRequest
+from memwatch import MemoryMonitor, rss_bytes
+from traces import TraceRecorder, TRACE_SUFFIX
+from router import ModelRouter, RouteContext, parse_rules
+from context_cache import ContextCache
+from orchestrator import Coordinator
+from compaction import ToolOutputCompactor, scaled_policies, schema_expand_tool_output
+import session_archive
+from session_archive import (
+    SessionMessage, SEGMENT_SUFFIX, archive_cold_sessions, read_jsonl, read_segment, write_segment,
+)
+from config import Config, PROFILES, RESTART_FIELDS, set_config
 
 from rich.console import Console
 from rich.panel import Panel
@@ -121,21 +140,21 @@ class ThinkingSpinner:
 class Logger:
     """Enhanced logging system with monitoring toggle"""
     
-    def __init__(self, log_dir: str = "logs"):
+    def __init__(self, log_dir: str = "logs", log_to_file: bool = True):
         self.log_dir = Path(log_dir)
-        self.log_dir.mkdir(exist_ok=True)
         self.monitoring_enabled = False  # Start with monitoring OFF
         
-        log_file = self.log_dir / f"sdx_agent_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
+        handlers = [RichHandler(console=Console(), show_time=True, show_path=True)]
+        if log_to_file:
+            self.log_dir.mkdir(exist_ok=True)
+            log_file = self.log_dir / f"sdx_agent_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
+            handlers.append(logging.FileHandler(log_file))
         
         # Configure logging
         logging.basicConfig(
             level=logging.INFO,
             format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-            handlers=[
-                RichHandler(console=Console(), show_time=True, show_path=True),
-                logging.FileHandler(log_file)
-            ]
+            handlers=handlers
         )
         self.logger = logging.getLogger("SDXAgent")
         
@@ -193,49 +212,111 @@ class Logger:
 # ============================================================================
 
 class SessionManager:
-    """Manages chat history and session state"""
+    """Manages chat history and session state
     
-    def __init__(self, session_dir: str = "sessions"):
+    Only the most recent messages stay in memory; older ones are rolled into
+    compressed segments next to the session file and streamed back on demand.
+    """
+    
+    def __init__(self, session_dir: str = "sessions", hot_limit: int = 200,
+                 archive_after_hours: float = 24):
         self.session_dir = Path(session_dir)
         self.session_dir.mkdir(exist_ok=True)
         self.session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
-        self.session_file = self.session_dir / f"session_{self.session_id}.json"
-        self.history: List[Dict[str, Any]] = []
+        self.session_file = self.session_dir / f"session_{self.session_id}.jsonl"
+        self.hot_limit = hot_limit
+        self.history: List[SessionMessage] = []
+        self.segments: List[Path] = []
+        self.archived_count = 0
         self.load_history()
+        archive_cold_sessions(self.session_dir, archive_after_hours, exclude=self.session_file)
+    
+    @property
+    def message_count(self) -> int:
+        return self.archived_count + len(self.history)
     
     def add_message(self, role: str, content: str, metadata: Optional[Dict] = None):
         """Add message to session history"""
-        message = {
-            "timestamp": datetime.now().isoformat(),
-            "role": role,
-            "content": content,
-            "metadata": metadata or {}
-        }
+        message = SessionMessage(datetime.now().isoformat(), role, content, metadata)
         self.history.append(message)
+        with open(self.session_file, 'a') as f:
+            f.write(session_archive.dumps(message) + "\n")
+        # roll in batches so the hot file is rewritten rarely
+        if len(self.history) > 2 * self.hot_limit:
+            self.compact()
+    
+    def compact(self, keep: Optional[int] = None):
+        """Move all but the last `keep` messages into a compressed segment"""
+        keep = self.hot_limit if keep is None else keep
+        if len(self.history) <= keep:
+            return
+        split = len(self.history) - keep
+        cold, self.history = self.history[:split], self.history[split:]
+        segment = self.session_dir / (
+            f"session_{self.session_id}.seg{len(self.segments) + 1:04d}{SEGMENT_SUFFIX}"
+        )
+        write_segment(segment, cold)
+        self.segments.append(segment)
+        self.archived_count += len(cold)
         self.save_history()
     
     def save_history(self):
-        """Save session history to file"""
-        with open(self.session_file, 'w') as f:
-            json.dump(self.history, f, indent=2)
+        """Rewrite the session file from the in-memory messages"""
+        tmp = self.session_file.with_name(self.session_file.name + ".tmp")
+        with open(tmp, 'w') as f:
+            for message in self.history:
+                f.write(session_archive.dumps(message) + "\n")
+        os.replace(tmp, self.session_file)
     
     def load_history(self):
         """Load session history from file"""
-        if self.session_file.exists():
-            try:
+        try:
+            self.segments = sorted(self.session_dir.glob(f"session_{self.session_id}.seg*"))
+            self.archived_count = sum(1 for path in self.segments for _ in read_segment(path))
+            if self.session_file.exists():
                 with open(self.session_file, 'r') as f:
-                    self.history = json.load(f)
-            except Exception as e:
-                if logger:
-                    logger.warning(f"Could not load session history: {e}")
-                self.history = []
+                    self.history = list(read_jsonl(f))
+        except Exception as e:
+            if logger:
+                logger.warning(f"Could not load session history: {e}")
+            self.history = []
+    
+    def tail(self, limit: int) -> List[SessionMessage]:
+        """Last `limit` messages, reading archived segments only if needed"""
+        if limit <= len(self.history) or not self.segments:
+            return self.history[-limit:] if limit > 0 else []
+        needed = limit - len(self.history)
+        older: List[SessionMessage] = []
+        for segment in reversed(self.segments):
+            older = list(read_segment(segment)) + older
+            if len(older) >= needed:
+                break
+        return older[-needed:] + self.history
+    
+    def iter_messages(self) -> Iterator[SessionMessage]:
+        """Stream the whole session, oldest first, without loading it all"""
+        for segment in self.segments:
+            yield from read_segment(segment)
+        yield from list(self.history)
+    
+    def export(self, path: Optional[Path] = None) -> Path:
+        """Stream the session to an uncompressed JSONL file for analysis"""
+        path = path or self.session_dir / f"export_{self.session_id}.jsonl"
+        with open(path, 'w') as f:
+            for message in self.iter_messages():
+                f.write(session_archive.dumps(message) + "\n")
+        return path
     
     def get_context(self, limit: int = 5) -> List[Dict]:
         """Get recent message context for the AI"""
-        return self.history[-limit:]
+        return [message.to_dict() for message in self.tail(limit)]
     
     def clear_history(self):
         """Clear current session history"""
+        for segment in self.segments:
+            segment.unlink(missing_ok=True)
+        self.segments = []
+        self.archived_count = 0
         self.history = []
         self.save_history()
 
@@ -251,7 +332,12 @@ class CommandHandler:
         'help': 'Show help information',
         'history': 'Show chat history',
         'clear': 'Clear chat history',
+        'export': 'Export the full session to a JSONL file',
+        'resume': 'Continue the last interrupted request',
         'status': 'Show agent status',
+        'stats': 'Show model latency, token and cache stats',
+        'mem': 'Show memory use; /mem on | off toggles allocation tracking',
+        'config': 'Show settings; /config reload | profile <name> | set <key> <value>',
         'monitor_on': 'Enable request monitoring (show API calls)',
         'monitor_off': 'Disable request monitoring (hide API calls)',
         'exit': 'Exit the agent',
@@ -259,10 +345,18 @@ class CommandHandler:
         'q': 'Exit the agent (shorthand)',
     }
     
-    def __init__(self, session: SessionManager, console: Console, logger: Logger):
+    def __init__(self, session: SessionManager, console: Console, logger: Logger,
+                 stats_provider: Optional[Callable[[], str]] = None,
+                 config_handler: Optional[Callable[[str], str]] = None,
+                 resume_handler: Optional[Callable[[], str]] = None,
+                 memory_handler: Optional[Callable[[str], str]] = None):
         self.session = session
         self.console = console
         self.logger = logger
+        self.stats_provider = stats_provider
+        self.config_handler = config_handler
+        self.resume_handler = resume_handler
+        self.memory_handler = memory_handler
     
     def is_command(self, text: str) -> bool:
         """Check if input is a command"""
@@ -285,9 +379,34 @@ class CommandHandler:
             self.session.clear_history()
             return "Chat history cleared."
         
+        if cmd == 'export':
+            path = self.session.export()
+            return f"Exported {self.session.message_count} messages to {path}"
+        
         if cmd == 'status':
             return self._show_status()
         
+        if cmd == 'resume':
+            if self.resume_handler is None:
+                return "Resuming is not available."
+            return self.resume_handler()
+        
+        if cmd == 'stats':
+            if self.stats_provider is None:
+                return "No stats available."
+            return self.stats_provider()
+        
+        if cmd == 'mem' or cmd.startswith('mem '):
+            if self.memory_handler is None:
+                return "No memory stats available."
+            return self.memory_handler(cmd[len('mem'):].strip())
+        
+        if cmd == 'config' or cmd.startswith('config '):
+            if self.config_handler is None:
+                return "Configuration cannot be changed at runtime."
+            # arguments keep their original case (model names, paths)
+            return self.config_handler(text.strip().lstrip('/')[len('config'):].strip())
+        
         if cmd == 'monitor_on':
             self.logger.enable_monitoring()
             return "✓ Monitoring enabled - API requests will be shown"
@@ -305,13 +424,13 @@ class CommandHandler:
         return help_text
     
     def _show_history(self) -> str:
-        if not self.session.history:
+        if not self.session.message_count:
             return "No chat history available."
         
         history_text = "\n[Recent Chat History]\n"
-        for i, msg in enumerate(self.session.history[-10:], 1):
-            role = msg['role'].upper()
-            content = msg['content'][:100] + "..." if len(msg['content']) > 100 else msg['content']
+        for i, msg in enumerate(self.session.tail(10), 1):
+            role = msg.role.upper()
+            content = msg.content[:100] + "..." if len(msg.content) > 100 else msg.content
             history_text += f"{i}. [{role}] {content}\n"
         return history_text
     
@@ -321,7 +440,7 @@ class CommandHandler:
         return (
             f"Working Directory: {cwd}\n"
             f"Session ID: {self.session.session_id}\n"
-            f"Messages: {len(self.session.history)}\n"
+            f"Messages: {self.session.message_count} ({len(self.session.segments)} archived segments)\n"
             f"Monitoring: {monitor_status}"
         )
 
@@ -335,6 +454,7 @@ class UI:
     
     def __init__(self):
         self.console = Console()
+        self.renderer = ResponseRenderer(self.console, accent=Theme.GREEN)
     
     def clear(self):
         self.console.clear()
@@ -422,6 +542,10 @@ class UI:
         )
         self.console.print(panel)
     
+    def response(self, title: str, content: str):
+        """Display a model answer (incremental for large answers, raw when piped)"""
+        self.renderer.render(title, content)
+    
     def error(self, title: str, content: str):
         """Display error message"""
         panel = Panel(
@@ -478,6 +602,8 @@ class SDXAgent:
 - **Read file contents**: Analyze existing code before changes
 - **Write to files**: Create new files or update existing ones
 - **Execute Python files**: Test code with optional arguments
+- **Run tests**: Run pytest in parallel sandboxed shards and get a compact pass/fail summary
+- **Query Python symbols**: Find definitions, references and file outlines without reading whole files
 
 ## Programming Expertise:
 - **Languages**: Python (expert), JavaScript/TypeScript, Java, C++, Go, SQL, Bash
@@ -499,17 +625,180 @@ class SDXAgent:
 - Be educational; help understand, not just provide solutions
 - Be professional; maintain technical accuracy"""
     
-    def __init__(self, api_key: Optional[str] = None):
-        self.api_key = api_key or os.environ.get("GEMINI_API_KEY")
-        if not self.api_key:
-            raise ValueError("GEMINI_API_KEY not found in environment variables")
+    def __init__(self, api_key: Optional[str] = None, config: Optional[Config] = None, client=None):
+        if config is None:
+            # Config.from_env raises ValueError when GEMINI_API_KEY is missing
+            config = Config.from_env() if api_key is None else Config(gemini_api_key=api_key)
+        self.config = config
+        self.api_key = api_key or config.gemini_api_key
         
-        self.client = genai.Client(api_key=self.api_key)
+        # any object with genai.Client's `models` and `caches` (e.g. traces.ReplayClient)
+        self.client = client or genai.Client(api_key=self.api_key)
         self.ui = UI()
-        self.session = SessionManager()
+        self.session = SessionManager(
+            session_dir=config.session_dir,
+            hot_limit=config.session_hot_limit,
+            archive_after_hours=config.session_archive_hours,
+        )
         self.logger = logger
-        self.command_handler = CommandHandler(self.session, self.ui.console, self.logger)
-        self.max_iterations = 20
+        self.command_handler = CommandHandler(
+            self.session, self.ui.console, self.logger,
+            stats_provider=self.stats_report, config_handler=self.config_command,
+            resume_handler=self.resume_request, memory_handler=self.memory_command,
+        )
+        self.max_iterations = config.max_iterations
+        self.prefetcher = Prefetcher()
+        self.loop_guard = LoopDetector()
+        self.checkpoints = CheckpointLog(config.session_dir, self.session.session_id)
+        self.memory = MemoryMonitor()
+        self.tracer = TraceRecorder(
+            Path(config.trace_dir) / f"trace_{self.session.session_id}{TRACE_SUFFIX}",
+            config, enabled=config.record_trace,
+        )
+        self.router = ModelRouter(
+            primary_model=self.config.model_name,
+            fast_model=self.config.fast_model_name,
+            rules=self.config.routing_rules,
+            enabled=self.config.enable_routing,
+        )
+        self.tools = self.get_tools()
+        self.last_compaction = "No requests yet."
+        self.context_cache = self._build_context_cache()
+        self.apply_config(config)
+    
+    def _build_context_cache(self) -> ContextCache:
+        return ContextCache(
+            backend=self.client.caches,
+            system_instruction=self.SYSTEM_PROMPT,
+            tools=[self.tools],
+            temperature=self.config.temperature,
+            ttl_seconds=self.config.context_cache_ttl,
+            enabled=self.config.enable_context_cache,
+            logger=self.logger,
+        )
+    
+    # ------------------------------------------------------------------
+    # Configuration
+    # ------------------------------------------------------------------
+    
+    def apply_config(self, config: Config) -> List[str]:
+        """Push config into every component; returns the fields that changed"""
+        # anything that can reject the config runs before state is touched
+        rules = parse_rules(config.routing_rules)
+        old, self.config = self.config, config
+        changed = [
+            name for name in vars(config)
+            if getattr(old, name) != getattr(config, name)
+        ]
+        # tools read the active config at call time
+        set_config(config)
+        
+        self.max_iterations = config.max_iterations
+        self.router.primary_model = config.model_name
+        self.router.fast_model = config.fast_model_name or config.model_name
+        self.router.enabled = config.enable_routing and self.router.fast_model != self.router.primary_model
+        self.router.rules = rules
+        
+        if {"temperature", "context_cache_ttl", "enable_context_cache"} & set(changed):
+            self.context_cache.close()
+            self.context_cache = self._build_context_cache()
+        
+        self.prefetcher.enabled = config.enable_prefetch
+        self.loop_guard.enabled = config.enable_loop_guard
+        self.loop_guard.stall_limit = config.loop_stall_limit
+        self.checkpoints.enabled = config.enable_checkpoints
+        self.memory.high_water_mb = config.memory_high_water_mb
+        self.memory.interval = config.memory_sample_interval
+        self.memory.top = config.memory_top_sites
+        self.tracer.config = config
+        self.tracer.enabled = config.record_trace
+        if config.enable_memory_sampler and not self.memory.sampling:
+            self.memory.start()
+        elif "enable_memory_sampler" in changed and not config.enable_memory_sampler:
+            self.memory.stop()
+        file_cache.resize(config.file_cache_mb * 1024 * 1024 if config.enable_caching else 0)
+        if "max_file_chars" in changed:
+            # cached contents were truncated at the old limit
+            file_cache.clear()
+        self.session.hot_limit = config.session_hot_limit
+        return changed
+    
+    # ------------------------------------------------------------------
+    # Memory
+    # ------------------------------------------------------------------
+    
+    def memory_components(self) -> Dict[str, int]:
+        """Approximate bytes held by the agent's long-lived structures"""
+        return {
+            f"session history ({len(self.session.history)} msgs)":
+                sum(message.stored_size() for message in self.session.history),
+            f"file read cache ({file_cache.stats()['entries']} files)": file_cache.current_bytes,
+            "loop guard results": self.loop_guard.held_bytes(),
+            "in-flight checkpoint (disk)": self.checkpoints.bytes_written,
+        }
+    
+    def relieve_memory(self):
+        """High-water relief: roll history into segments and drop caches"""
+        before = rss_bytes()
+        self.session.compact(keep=min(self.session.hot_limit, 20))
+        file_cache.clear()
+        gc.collect()
+        after = rss_bytes()
+        self.memory.relieved(before, after)
+        self.logger.warning(
+            f"Memory high-water mark ({self.config.memory_high_water_mb} MB) reached: "
+            f"compacted history and cleared caches, RSS {before / 2**20:.0f} -> {after / 2**20:.0f} MB"
+        )
+    
+    def memory_command(self, args: str) -> str:
+        """Handle /mem [on | off]"""
+        if args == "on":
+            self.memory.start()
+            return f"✓ Memory sampler on (tracemalloc, every {self.memory.interval}s)"
+        if args == "off":
+            self.memory.stop()
+            return "✓ Memory sampler off"
+        if args:
+            return "Usage: /mem [on | off]"
+        return self.memory.report(self.memory_components())
+    
+    def make_compactor(self) -> ToolOutputCompactor:
+        """Tool-output compactor sized by the active config"""
+        return ToolOutputCompactor(
+            scaled_policies(self.config.tool_output_scale),
+            keep_recent=self.config.compaction_keep_recent,
+        )
+    
+    def config_command(self, args: str) -> str:
+        """Handle /config [reload | profile <name> | set <key> <value>]"""
+        parts = args.split(maxsplit=2)
+        action = parts[0].lower() if parts else ""
+        try:
+            if not action:
+                return (
+                    f"[Config]\n{self.config.summary()}\n\n"
+                    f"Profiles: {', '.join(PROFILES)}"
+                )
+            if action == "reload":
+                new_config = Config.from_env(override=True)
+            elif action == "profile" and len(parts) == 2:
+                new_config = self.config.with_profile(parts[1])
+            elif action == "set" and len(parts) == 3:
+                new_config = self.config.with_value(parts[1], parts[2])
+            else:
+                return "Usage: /config [reload | profile <name> | set <key> <value>]"
+        except ValueError as e:
+            return f"Config error: {e}"
+        
+        changed = self.apply_config(new_config)
+        if not changed:
+            return "No settings changed."
+        self.logger.info(f"Config updated: {', '.join(changed)}")
+        lines = [f"  {name} = {getattr(new_config, name)}" for name in changed]
+        restart = [name for name in changed if name in RESTART_FIELDS]
+        if restart:
+            lines.append(f"Takes effect after restart: {', '.join(restart)}")
+        return "Updated:\n" + "\n".join(lines)
     
     def get_tools(self) -> types.Tool:
         """Define available tools for the agent"""
@@ -519,61 +808,142 @@ class SDXAgent:
                 schema_get_file_content,
                 schema_run_python_file,
                 schema_write_file,
+                schema_query_symbols,
+                schema_run_tests,
+                schema_expand_tool_output,
             ],
         )
     
-    def get_config(self) -> types.GenerateContentConfig:
-        """Get AI model configuration"""
-        return types.GenerateContentConfig(
-            tools=[self.get_tools()],
-            system_instruction=self.SYSTEM_PROMPT,
-            temperature=0.7,
-        )
+    def get_config(self, model: Optional[str] = None) -> types.GenerateContentConfig:
+        """Get AI model configuration (built once, backed by the context cache)"""
+        return self.context_cache.config_for(model or self.config.model_name)
     
-    def process_request(self, user_input: str, verbose: bool = False):
-        """Process user request with AI"""
+    def process_request(self, user_input: str, verbose: bool = False,
+                        resume: Optional[InterruptedRequest] = None):
+        """Process user request with AI (or continue an interrupted one)"""
         try:
             # Start thinking animation
             spinner = ThinkingSpinner()
             spinner.start()
             
-            self.session.add_message("user", user_input)
+            file_cache.begin_request()
+            self.prefetcher.reset()
+            self.loop_guard.reset()
+            self.tracer.begin_request(user_input)
             
             messages = [types.Content(role="user", parts=[types.Part(text=user_input)])]
-            config = self.get_config()
+            compactor = self.make_compactor()
+            deadline = time.monotonic() + self.config.timeout
+            
+            after_tool_results = False
+            failures = 0
+            first_iteration = 0
+            # a malformed response or an exception leaves the checkpoint for /resume
+            keep_checkpoint = False
             
-            for iteration in range(self.max_iterations):
-                response = self.client.models.generate_content(
-                    model='gemini-2.5-flash',
-                    contents=messages,
-                    config=config
+            if resume is None:
+                self.session.add_message("user", user_input)
+                self.checkpoints.begin(user_input)
+            else:
+                self.checkpoints.begin(user_input, resumed_from=resume.started)
+                self.checkpoints.replay(resume)
+                self.checkpoints.discard(resume)
+                self._restore(resume, messages, compactor)
+                first_iteration = resume.iterations
+                after_tool_results = True
+            
+            for iteration in range(first_iteration, self.max_iterations):
+                if time.monotonic() > deadline:
+                    spinner.stop()
+                    self.ui.warning(
+                        "Time Limit Reached",
+                        f"Request exceeded the {self.config.timeout}s timeout after {iteration} iterations."
+                    )
+                    self.logger.warning(f"Timeout reached for request: {user_input[:50]}...")
+                    break
+                self.loop_guard.begin_iteration(iteration)
+                if self.memory.check():
+                    self.relieve_memory()
+                forget_elided(compactor.elide_older(messages))
+                # warm the read cache with likely-next files while the model thinks
+                self.prefetcher.start()
+                route = RouteContext(
+                    iteration=iteration, after_tool_results=after_tool_results, failures=failures
                 )
+                model, response = self._generate(messages, route)
+                
+                if response is not None and not response.function_calls \
+                        and not self.router.is_primary(model):
+                    # the fast model answered; only a final_answer rule sends it to another model
+                    route.final_answer = True
+                    if self.router.choose(route)[0] != model:
+                        model, response = self._generate(messages, route)
+                failures = route.failures
                 
                 if response is None or response.usage_metadata is None:
                     spinner.stop()
                     self.ui.error("Response Error", "Response is malformed or empty")
                     self.logger.error("Malformed response from API")
+                    keep_checkpoint = True
                     break
                 
                 if verbose:
-                    self._display_verbose_info(iteration, response)
+                    self._display_verbose_info(iteration, response, model)
                 
+                after_tool_results = bool(response.function_calls)
                 if response.candidates:
                     for candidate in response.candidates:
                         if candidate and candidate.content:
                             messages.append(candidate.content)
+                            self.checkpoints.model_turn(iteration, candidate.content)
                     
                     if response.function_calls:
+                        compactor.begin_turn(iteration)
                         for function_call in response.function_calls:
-                            result = call_function(function_call, verbose)
-                            messages.append(result)
+                            if function_call.name == "expand_tool_output":
+                                compactor.add_expansion(messages, function_call)
+                                self.checkpoints.expansion(iteration, function_call)
+                                continue
+                            repeated = self.loop_guard.lookup(function_call.name, function_call.args)
+                            if repeated is not None:
+                                result = self._tool_result(function_call.name, repeated)
+                                compactor.add(messages, function_call, result)
+                                self.checkpoints.tool_result(iteration, function_call, result, repeated=True)
+                                continue
+                            with self.tracer.stage(f"tool:{function_call.name}") as stage:
+                                result = call_function(function_call, verbose)
+                                result_text = self._function_result_text(result)
+                                stage.bytes = len(result_text)
+                            self.tracer.tool_call(function_call.name, function_call.args, result_text)
+                            self.loop_guard.record(function_call.name, function_call.args, result_text)
+                            with self.tracer.stage("compaction"):
+                                compactor.add(messages, function_call, result)
+                            with self.tracer.stage("checkpoint") as stage:
+                                written = self.checkpoints.bytes_written
+                                self.checkpoints.tool_result(iteration, function_call, result)
+                                stage.bytes = self.checkpoints.bytes_written - written
+                            self.prefetcher.observe(function_call.name, function_call.args, result_text)
+                        self.checkpoints.iteration_done(iteration)
+                        
+                        diagnostic = self.loop_guard.end_iteration()
+                        if diagnostic:
+                            spinner.stop()
+                            self.loop_guard.stopped_early(self.max_iterations - iteration - 1)
+                            self.ui.warning("Stopped: No Progress", diagnostic)
+                            self.logger.warning(f"Loop guard stopped request after {iteration + 1} iterations: {user_input[:50]}...")
+                            break
                     else:
                         # Final response - stop spinner
                         spinner.stop("Request complete")
                         response_text = response.text
-                        self.session.add_message("assistant", response_text)
-                        self.ui.success("SDX Agent Response", response_text)
+                        with self.tracer.stage("session"):
+                            self.session.add_message("assistant", response_text)
+                        with self.tracer.stage("render") as stage:
+                            self.ui.response("SDX Agent Response", response_text)
+                            stage.bytes = len(response_text)
                         self.logger.info("Request processed successfully")
+                        self.logger.info(f"Prefetch: {self.prefetcher.stats_line()}")
+                        self.logger.info(f"Model stats:\n{self.router.report()}")
                         break
             else:
                 spinner.stop()
@@ -582,20 +952,162 @@ class SDXAgent:
                     f"Reached maximum iterations ({self.max_iterations}). Task may require more steps."
                 )
                 self.logger.warning(f"Max iterations reached for request: {user_input[:50]}...")
+            
+            if not keep_checkpoint:
+                self.checkpoints.finish()
+            self.last_compaction = compactor.report()
+            self.logger.info(f"Compaction: {self.last_compaction}")
+        
+        except KeyboardInterrupt:
+            if 'spinner' in locals():
+                spinner.stop()
+            self.ui.warning("Interrupted", "Request interrupted. Type /resume to continue from the last completed step.")
+            self.logger.warning(f"Request interrupted: {user_input[:50]}...")
         
         except Exception as e:
             if 'spinner' in locals():
                 spinner.stop()
             self.ui.error("Error Processing Request", str(e))
             self.logger.error(f"Error processing request: {e}")
+        
+        finally:
+            self.tracer.end_request()
+    
+    def _restore(self, resume: InterruptedRequest, messages: List[types.Content],
+                 compactor: ToolOutputCompactor):
+        """Rebuild messages, compaction and loop-guard state from checkpoint records"""
+        for kind, record in resume.contents():
+            if kind == "model":
+                messages.append(record["content"])
+                compactor.begin_turn(record["iteration"])
+            elif kind == "tool":
+                function_call = types.FunctionCall(name=record["name"], args=record["args"])
+                compactor.add(messages, function_call, record["content"])
+                if not record["repeated"]:
+                    self.loop_guard.record(
+                        record["name"], record["args"], self._function_result_text(record["content"])
+                    )
+            elif kind == "expansion":
+                compactor.add_expansion(messages, types.FunctionCall(name=record["name"], args=record["args"]))
+            elif kind == "iteration":
+                self.loop_guard.begin_iteration(record["iteration"] + 1)
+                compactor.elide_older(messages)
     
-    def _display_verbose_info(self, iteration: int, response):
+    def resume_request(self) -> str:
+        """Continue the most recent interrupted request (/resume)"""
+        interrupted = self.checkpoints.find_interrupted()
+        if interrupted is None:
+            return "No interrupted request to resume."
+        self.logger.info(
+            f"Resuming request from {interrupted.started} after {interrupted.iterations} completed iterations"
+        )
+        self.ui.separator()
+        self.ui.info(
+            "Resuming",
+            f"{interrupted.user_input[:200]}\n\n"
+            f"Skipping {interrupted.iterations} completed iteration(s); continuing from iteration {interrupted.iterations + 1}."
+        )
+        self.process_request(interrupted.user_input, resume=interrupted)
+        self.ui.separator()
+        return ""
+    
+    def process_parallel(self, user_input: str, verbose: bool = False):
+        """Split a large request across concurrent worker agents"""
+        spinner = ThinkingSpinner(prefix="⚙  Planning and running workers")
+        try:
+            spinner.start()
+            # planner, worker and merge calls are traced per channel so replay can route them
+            self.tracer.begin_request(user_input, mode="parallel")
+            self.session.add_message("user", user_input, {"mode": "parallel"})
+            coordinator = Coordinator(self, max_workers=self.config.max_workers, verbose=verbose)
+            answer, results, report = coordinator.run(user_input)
+            spinner.stop("Request complete")
+            with self.tracer.stage("session"):
+                self.session.add_message("assistant", answer, {"mode": "parallel", "subtasks": len(results)})
+            with self.tracer.stage("render") as stage:
+                self.ui.response("SDX Agent Response", answer)
+                stage.bytes = len(answer)
+            self.ui.info("Parallel Run", report)
+            self.logger.info(f"Parallel request processed:\n{report}")
+        except Exception as e:
+            spinner.stop()
+            self.ui.error("Error Processing Request", str(e))
+            self.logger.error(f"Error processing parallel request: {e}")
+        finally:
+            self.tracer.end_request()
+    
+    def _generate(self, messages: List[types.Content], route: RouteContext):
+        """Call the routed model, escalating to the primary model on failure"""
+        model, rule = self.router.choose(route)
+        while True:
+            self.logger.debug(f"Iteration {route.iteration + 1}: {model} (rule: {rule})")
+            response, error = self._call_model(model, messages, self.get_config(model))
+            ok = response is not None and response.usage_metadata is not None
+            if ok:
+                self.context_cache.record_usage(response.usage_metadata)
+                return model, response
+            
+            route.failures += 1
+            stronger = self.router.escalate(model)
+            if stronger is None:
+                if error is not None:
+                    raise error
+                return model, response
+            self.logger.warning(f"{model} failed ({error or 'malformed response'}), escalating to {stronger}")
+            model, rule = stronger, "escalation"
+    
+    def _call_model(self, model: str, contents: List[types.Content],
+                    config: types.GenerateContentConfig):
+        """One generate_content call, traced and counted in the model stats; returns (response, error)"""
+        started = time.perf_counter()
+        try:
+            response = self.client.models.generate_content(model=model, contents=contents, config=config)
+            error = None
+        except Exception as e:
+            response, error = None, e
+        latency = time.perf_counter() - started
+        self.tracer.model_response(model, response, latency, error)
+        ok = response is not None and response.usage_metadata is not None
+        self.router.record(model, latency, response.usage_metadata if ok else None, ok)
+        return response, error
+    
+    def stats_report(self) -> str:
+        """Performance stats for the /stats command"""
+        return (
+            f"[Models]\n{self.router.report()}\n\n"
+            f"[Context Cache]\n{self.context_cache.report()}\n\n"
+            f"[Tool Output Compaction (last request)]\n{self.last_compaction}\n\n"
+            f"[Prefetch (last request)]\n{self.prefetcher.stats_line()}\n\n"
+            f"[Loop Guard]\n{self.loop_guard.report()}"
+        )
+    
+    @staticmethod
+    def _tool_result(name: str, text: str) -> types.Content:
+        """Tool response carrying text that was not produced by call_function"""
+        return types.Content(
+            role="tool",
+            parts=[types.Part.from_function_response(name=name, response={"result": text})],
+        )
+    
+    @staticmethod
+    def _function_result_text(result: types.Content) -> str:
+        """Extract the plain result string from a tool response"""
+        try:
+            response = result.parts[0].function_response.response or {}
+        except (AttributeError, IndexError, TypeError):
+            return ""
+        return str(response.get("result", ""))
+    
+    def _display_verbose_info(self, iteration: int, response, model: str):
         """Display verbose token and iteration information"""
         info_text = (
             f"Iteration: {iteration + 1}/{self.max_iterations}\n"
+            f"Model: {model}\n"
             f"Prompt tokens: {response.usage_metadata.prompt_token_count}\n"
+            f"Cached prompt tokens: {response.usage_metadata.cached_content_token_count or 0}\n"
             f"Candidate tokens: {response.usage_metadata.candidates_token_count}\n"
-            f"Total tokens: {response.usage_metadata.total_token_count}"
+            f"Total tokens: {response.usage_metadata.total_token_count}\n"
+            f"Prefetch: {self.prefetcher.stats_line()}"
         )
         self.ui.info("Token Usage", info_text)
     
@@ -628,8 +1140,15 @@ class SDXAgent:
                 if verbose_flag:
                     user_input = user_input.replace('--verbose', '').strip()
                 
+                parallel_flag = '--parallel' in user_input
+                if parallel_flag:
+                    user_input = user_input.replace('--parallel', '').strip()
+                
                 self.ui.separator()
-                self.process_request(user_input, verbose_flag)
+                if parallel_flag:
+                    self.process_parallel(user_input, verbose_flag)
+                else:
+                    self.process_request(user_input, verbose_flag)
                 self.ui.separator()
                 self.ui.console.print()
             
@@ -640,6 +1159,12 @@ class SDXAgent:
             except Exception as e:
                 self.ui.error("Unexpected Error", str(e))
                 self.logger.error(f"Unexpected error in interactive loop: {e}", exc_info=True)
+        
+        # cached prefixes are billed for storage until they expire
+        self.context_cache.close()
+        self.checkpoints.close()
+        self.memory.stop()
+        self.tracer.close()
 
 
 # ============================================================================
@@ -655,18 +1180,23 @@ def main():
     # Load environment variables
     load_dotenv()
     
+    try:
+        config = Config.from_env()
+    except ValueError:
+        config = None  # SDXAgent raises it again below and the error is reported there
+    
     # Initialize logger
-    logger = Logger()
+    logger = Logger(config.log_dir, log_to_file=config.enable_logging) if config else Logger()
     logger.info("SDX Agent initializing...")
     
     try:
         # Initialize and run agent
-        agent = SDXAgent()
+        agent = SDXAgent(config=config)
         agent.run_interactive()
     
     except ValueError as e:
         console = Console()
-        console.print(f"[bold {Theme.RED}]✗ Configuration Error[/bold {Theme.RED}]")
+        console.print(f"[bold {Theme.RED}]✗ Configuration Error: {e}[/bold {Theme.RED}]")
         console.print(f"[{Theme.YELLOW}]Please create a .env file with:[/{Theme.YELLOW}]")
         console.print("  GEMINI_API_KEY=your_api_key_here")
         if logger:
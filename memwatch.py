@@ -0,0 +1,177 @@
+"""
+Memory monitoring for long-running SDX Agent sessions
+
+`MemoryMonitor` reads the process RSS, keeps a rolling window of samples for
+growth trends, and optionally runs `tracemalloc` with a background sampler to
+report the top allocation sites. `check()` is cheap and is called by the agent
+between iterations; it reports when RSS is above the configured high-water
+mark so the agent can compact history and drop caches on its own thread.
+"""
+
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+MB = 1024 * 1024
+
+# allocation sites inside these files are monitoring overhead, not the agent
+_IGNORED_FILES = (tracemalloc.__file__, __file__, "<frozen importlib._bootstrap>", "<unknown>")
+
+
+def rss_bytes() -> int:
+    """Current resident set size, or the peak RSS where /proc is not available"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # bytes on macOS, kilobytes elsewhere
+        return peak if sys.platform == "darwin" else peak * 1024
+    return 0
+
+
+class MemoryMonitor:
+    """RSS samples, tracemalloc allocation sites and a high-water mark"""
+
+    def __init__(self, high_water_mb: int = 1024, interval: float = 30.0,
+                 window: int = 120, top: int = 10):
+        self.high_water_mb = high_water_mb
+        self.interval = interval
+        self.top = top
+        self.samples: Deque[Tuple[float, int, int]] = deque(maxlen=window)
+        self.peak_rss = 0
+        self.relief_runs = 0
+        self.relieved_bytes = 0
+        self._relief_rss = 0
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Sampling
+    # ------------------------------------------------------------------
+
+    @property
+    def sampling(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def sample(self) -> int:
+        rss = rss_bytes()
+        traced = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+        with self._lock:
+            self.samples.append((time.time(), rss, traced))
+            self.peak_rss = max(self.peak_rss, rss)
+        return rss
+
+    def start(self, frames: int = 1):
+        """Start tracemalloc and the background sampler"""
+        if self.sampling:
+            return
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the sampler and tracemalloc (its bookkeeping costs memory too)"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=1)
+        self._thread = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.sample()
+            self._stop.wait(self.interval)
+
+    def check(self) -> bool:
+        """True when RSS is above the high-water mark and has grown since the last relief
+
+        Freed memory is often not returned to the OS, so RSS can stay above the
+        mark after a relief run; another run is only due after 10% more growth.
+        """
+        if not self.high_water_mb:
+            return False
+        rss = self.sample()
+        return rss > self.high_water_mb * MB and rss > self._relief_rss * 1.1
+
+    def relieved(self, before: int, after: int):
+        self.relief_runs += 1
+        self.relieved_bytes += max(0, before - after)
+        self._relief_rss = after
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+
+    def growth_per_hour(self) -> Optional[float]:
+        """Least-squares RSS growth over the sample window, in bytes per hour"""
+        with self._lock:
+            points = list(self.samples)
+        if len(points) < 3 or points[-1][0] - points[0][0] < 1:
+            return None
+        t0 = points[0][0]
+        xs = [(t - t0) / 3600 for t, _, _ in points]
+        ys = [rss for _, rss, _ in points]
+        mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+        denominator = sum((x - mean_x) ** 2 for x in xs)
+        if not denominator:
+            return None
+        return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / denominator
+
+    def top_sites(self, limit: Optional[int] = None) -> List[str]:
+        if not tracemalloc.is_tracing():
+            return []
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, pattern) for pattern in _IGNORED_FILES]
+        )
+        lines = []
+        for stat in snapshot.statistics("lineno")[:limit or self.top]:
+            frame = stat.traceback[0]
+            lines.append(
+                f"{stat.size / MB:8.2f} MB {stat.count:>8} blocks  "
+                f"{os.path.relpath(frame.filename)}:{frame.lineno}"
+            )
+        return lines
+
+    def report(self, components: Dict[str, int]) -> str:
+        rss = self.sample()
+        lines = [
+            f"RSS: {rss / MB:.1f} MB (peak {self.peak_rss / MB:.1f} MB, "
+            f"high-water {self.high_water_mb or 'off'}{' MB' if self.high_water_mb else ''})",
+        ]
+        growth = self.growth_per_hour()
+        if growth is not None:
+            span = self.samples[-1][0] - self.samples[0][0]
+            lines.append(f"Growth: {growth / MB:+.1f} MB/hour over the last {span / 60:.1f} min ({len(self.samples)} samples)")
+        else:
+            lines.append("Growth: not enough samples yet (/mem on starts the sampler)")
+        if self.relief_runs:
+            lines.append(f"High-water relief: {self.relief_runs} run(s), {self.relieved_bytes / MB:.1f} MB released")
+
+        lines.append("\n[Session]")
+        for name, size in components.items():
+            lines.append(f"  {name:<28} {size / MB:8.2f} MB")
+
+        sites = self.top_sites()
+        if sites:
+            traced, traced_peak = tracemalloc.get_traced_memory()
+            lines.append(f"\n[Top allocation sites] traced {traced / MB:.1f} MB (peak {traced_peak / MB:.1f} MB)")
+            lines.extend(f"  {site}" for site in sites)
+        else:
+            lines.append("\ntracemalloc is off; /mem on enables allocation-site tracking")
+        return "\n".join(lines)
@@ -0,0 +1,263 @@
+"""
+Parallel planner/worker mode for SDX Agent
+
+A coordinator asks the primary model to split a large task into independent
+subtasks, runs one worker loop per subtask concurrently (each with its own
+message list and exclusive write access to the files it was given), then asks
+the model to merge the worker reports into a single answer.
+"""
+
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from google.genai import types
+
+from cache import file_cache
+from call_function import call_function, forget_elided
+from func.get_files_info import get_files_info
+from router import RouteContext
+from trace_channels import trace_channel
+
+
+PLANNER_PROMPT = """You split software engineering tasks into independent subtasks that can be worked on in parallel.
+Each subtask must touch a disjoint set of files; list every file the subtask may create or modify.
+Return a JSON array. Prefer 2-8 subtasks; return a single subtask if the work cannot be split safely."""
+
+PLAN_SCHEMA = types.Schema(
+    type=types.Type.ARRAY,
+    items=types.Schema(
+        type=types.Type.OBJECT,
+        properties={
+            "description": types.Schema(type=types.Type.STRING),
+            "files": types.Schema(type=types.Type.ARRAY, items=types.Schema(type=types.Type.STRING)),
+        },
+        required=["description", "files"],
+    ),
+)
+
+
+@dataclass
+class Subtask:
+    id: int
+    description: str
+    files: List[str] = field(default_factory=list)
+
+
+@dataclass
+class WorkerResult:
+    subtask: Subtask
+    text: str = ""
+    elapsed: float = 0.0
+    iterations: int = 0
+    error: Optional[str] = None
+
+
+class FileLockRegistry:
+    """Exclusive write ownership of files per worker"""
+
+    def __init__(self):
+        self._owners: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(file_path: str) -> str:
+        return os.path.normpath(file_path)
+
+    def claim(self, worker_id: int, files: List[str]) -> List[str]:
+        """Claim files for a worker, returning the ones already owned by another worker"""
+        conflicts = []
+        with self._lock:
+            for file_path in files:
+                path = self._normalize(file_path)
+                owner = self._owners.setdefault(path, worker_id)
+                if owner != worker_id:
+                    conflicts.append(file_path)
+        return conflicts
+
+    def can_write(self, worker_id: int, file_path: str) -> bool:
+        with self._lock:
+            return self._owners.get(self._normalize(file_path)) == worker_id
+
+
+class Coordinator:
+    """Plans, dispatches and merges a task across concurrent worker loops"""
+
+    def __init__(self, agent, max_workers: int = 4, verbose: bool = False):
+        self.agent = agent
+        self.max_workers = max(1, max_workers)
+        self.verbose = verbose
+        self.locks = FileLockRegistry()
+        self.planner_config = types.GenerateContentConfig(
+            system_instruction=PLANNER_PROMPT,
+            response_mime_type="application/json",
+            response_schema=PLAN_SCHEMA,
+            temperature=0.2,
+        )
+
+    # ------------------------------------------------------------------
+    # Planning
+    # ------------------------------------------------------------------
+
+    def _model_text(self, prompt: str, config: types.GenerateContentConfig) -> str:
+        response, error = self.agent._call_model(
+            self.agent.router.primary_model,
+            [types.Content(role="user", parts=[types.Part(text=prompt)])],
+            config,
+        )
+        if error is not None:
+            raise error
+        if response is None or response.usage_metadata is None or not response.text:
+            raise RuntimeError("Coordinator received an empty response")
+        return response.text
+
+    def plan(self, task: str) -> List[Subtask]:
+        listing = get_files_info(".")
+        prompt = f"Task:\n{task}\n\nFiles in the working directory:\n{listing}"
+        with trace_channel("plan"):
+            raw = json.loads(self._model_text(prompt, self.planner_config))
+        subtasks = []
+        for item in raw:
+            description = str(item.get("description", "")).strip()
+            if description:
+                files = [str(f) for f in item.get("files", [])]
+                subtasks.append(Subtask(id=len(subtasks) + 1, description=description, files=files))
+        return subtasks
+
+    # ------------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------------
+
+    def _dispatch(self, worker_id: int, function_call) -> types.Content:
+        if function_call.name == "write_file":
+            file_path = (function_call.args or {}).get("file_path", "")
+            if not self.locks.can_write(worker_id, file_path):
+                return types.Content(
+                    role="tool",
+                    parts=[types.Part.from_function_response(
+                        name=function_call.name,
+                        response={"error": f"{file_path} is not assigned to this worker; "
+                                           f"another worker owns it or it is outside your subtask"},
+                    )],
+                )
+        tracer = self.agent.tracer
+        with tracer.stage(f"tool:{function_call.name}") as stage:
+            result = call_function(function_call, self.verbose)
+            result_text = self.agent._function_result_text(result)
+            stage.bytes = len(result_text)
+        tracer.tool_call(function_call.name, function_call.args, result_text)
+        return result
+
+    def run_worker(self, task: str, subtask: Subtask) -> WorkerResult:
+        result = WorkerResult(subtask=subtask)
+        started = time.perf_counter()
+        file_cache.begin_request()
+        owned = [f for f in subtask.files if self.locks.can_write(subtask.id, f)]
+        prompt = (
+            f"You are worker {subtask.id} on a larger task that is being done in parallel.\n"
+            f"Overall task: {task}\n\n"
+            f"Your subtask: {subtask.description}\n"
+            f"You may only write these files: {', '.join(owned) or '(none, read-only)'}\n"
+            f"Other workers handle the rest. Finish with a short report of what you changed."
+        )
+        messages = [types.Content(role="user", parts=[types.Part(text=prompt)])]
+        compactor = self.agent.make_compactor()
+        after_tool_results = False
+        # model calls from this thread replay from the worker's own channel
+        with trace_channel(f"worker:{subtask.id}"):
+            try:
+                for iteration in range(self.agent.max_iterations):
+                    result.iterations = iteration + 1
+                    forget_elided(compactor.elide_older(messages))
+                    route = RouteContext(iteration=iteration, after_tool_results=after_tool_results)
+                    _, response = self.agent._generate(messages, route)
+                    if response is None or response.usage_metadata is None:
+                        raise RuntimeError("Malformed response from API")
+                    for candidate in response.candidates or []:
+                        if candidate and candidate.content:
+                            messages.append(candidate.content)
+                    after_tool_results = bool(response.function_calls)
+                    if not response.function_calls:
+                        result.text = response.text or ""
+                        break
+                    compactor.begin_turn(iteration)
+                    for function_call in response.function_calls:
+                        if function_call.name == "expand_tool_output":
+                            compactor.add_expansion(messages, function_call)
+                        else:
+                            compactor.add(messages, function_call, self._dispatch(subtask.id, function_call))
+                else:
+                    result.error = f"reached maximum iterations ({self.agent.max_iterations})"
+            except Exception as e:
+                result.error = str(e)
+        result.elapsed = time.perf_counter() - started
+        return result
+
+    # ------------------------------------------------------------------
+    # Merge
+    # ------------------------------------------------------------------
+
+    def merge(self, task: str, results: List[WorkerResult]) -> str:
+        reports = []
+        for r in results:
+            status = f"FAILED: {r.error}" if r.error else "done"
+            reports.append(
+                f"## Subtask {r.subtask.id} ({status})\n{r.subtask.description}\n"
+                f"Files: {', '.join(r.subtask.files) or '-'}\n\n{r.text}"
+            )
+        prompt = (
+            f"The task '{task}' was split across parallel workers. Merge their reports into one "
+            f"concise answer for the user: what was done, anything that failed, and follow-ups.\n\n"
+            + "\n\n".join(reports)
+        )
+        config = types.GenerateContentConfig(temperature=self.agent.config.temperature)
+        with trace_channel("merge"):
+            return self._model_text(prompt, config)
+
+    # ------------------------------------------------------------------
+    # Entry point
+    # ------------------------------------------------------------------
+
+    def run(self, task: str):
+        """Run the task, returning (answer, worker results, timing report)"""
+        started = time.perf_counter()
+        subtasks = self.plan(task)
+        plan_time = time.perf_counter() - started
+        if not subtasks:
+            raise RuntimeError("Planner returned no subtasks")
+
+        conflicts = {}
+        for subtask in subtasks:
+            taken = self.locks.claim(subtask.id, subtask.files)
+            if taken:
+                conflicts[subtask.id] = taken
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(subtasks))) as pool:
+            results = list(pool.map(lambda s: self.run_worker(task, s), subtasks))
+        workers_wall = time.perf_counter() - started - plan_time
+
+        merge_started = time.perf_counter()
+        answer = self.merge(task, results)
+        merge_time = time.perf_counter() - merge_started
+
+        wall = time.perf_counter() - started
+        # summed busy time, not a measured single-loop run
+        busy = plan_time + sum(r.elapsed for r in results) + merge_time
+        lines = [
+            f"Subtasks: {len(subtasks)}, workers: {min(self.max_workers, len(subtasks))}",
+            f"Plan: {plan_time:.1f}s, workers: {workers_wall:.1f}s wall, merge: {merge_time:.1f}s",
+        ]
+        for r in results:
+            status = f"failed ({r.error})" if r.error else "ok"
+            lines.append(f"  #{r.subtask.id}: {r.elapsed:.1f}s, {r.iterations} iterations, {status}")
+        for worker_id, files in conflicts.items():
+            lines.append(f"  #{worker_id}: read-only for {', '.join(files)} (owned by another worker)")
+        lines.append(
+            f"Wall clock: {wall:.1f}s for {busy:.1f}s of plan, worker and merge time "
+            f"(parallelism {busy / wall if wall else 1.0:.2f}x)"
+        )
+        return answer, results, "\n".join(lines)
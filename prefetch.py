@@ -0,0 +1,175 @@
+"""
+Speculative file prefetching for SDX Agent
+
+While the model call is in flight the agent is idle, so the files the model
+is most likely to ask for next are loaded into the shared read cache.
+"""
+
+import os
+import re
+import ast
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set
+
+from cache import file_cache
+from func.get_file_content import warm_file_cache
+
+
+_LISTING_LINE = re.compile(r"^- (.+?)\s+size: (\d+) bytes\s+is_dir: (True|False)(?:\s+type: (\w+))?$")
+
+
+class Prefetcher:
+    """Warms the file read cache with likely-next files in a background thread"""
+
+    def __init__(self, working_directory: str = ".", max_queue: int = 32,
+                 max_file_size: int = 256 * 1024):
+        self.working_directory = os.path.abspath(working_directory)
+        self.max_queue = max_queue
+        self.max_file_size = max_file_size
+        self.enabled = True
+        self._queue: Deque[str] = deque()
+        self._queued: Set[str] = set()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.scheduled = 0
+        self.loaded_bytes = 0
+        # counters at the start of the current request, so stats are per request
+        self._baseline: Dict[str, int] = {}
+
+    # ------------------------------------------------------------------
+    # Candidate collection
+    # ------------------------------------------------------------------
+
+    def observe(self, function_name: str, args: Optional[Dict], result: str):
+        """Collect prefetch candidates from a finished tool call"""
+        if not self.enabled:
+            return
+        args = args or {}
+        if function_name == "get_files_info":
+            self._schedule(self._listing_candidates(args.get("directory", "."), result))
+        elif function_name == "get_file_content":
+            file_path = args.get("file_path", "")
+            if file_path.endswith(".py"):
+                self._schedule(self._import_candidates(file_path))
+
+    def _listing_candidates(self, directory: str, listing: str) -> List[str]:
+        candidates = []
+        for line in listing.splitlines():
+            match = _LISTING_LINE.match(line.strip())
+            if not match:
+                continue
+            name, size, is_dir, kind = match.groups()
+            if is_dir == "True" or kind in ("binary", "special") or int(size) > self.max_file_size:
+                continue
+            candidates.append(os.path.join(directory, name))
+        return candidates
+
+    def _import_candidates(self, file_path: str) -> List[str]:
+        abs_path = self._resolve(file_path)
+        if abs_path is None:
+            return []
+        source = file_cache.previous_read(abs_path)
+        if source is None:
+            return []
+        try:
+            tree = ast.parse(source)
+        except SyntaxError:
+            return []
+
+        package_dir = os.path.dirname(abs_path)
+        candidates = []
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                for alias in node.names:
+                    candidates.extend(self._module_paths(self.working_directory, alias.name))
+            elif isinstance(node, ast.ImportFrom):
+                base = self.working_directory
+                if node.level:
+                    base = package_dir
+                    for _ in range(node.level - 1):
+                        base = os.path.dirname(base)
+                module = node.module or ""
+                candidates.extend(self._module_paths(base, module))
+                for alias in node.names:
+                    dotted = f"{module}.{alias.name}" if module else alias.name
+                    candidates.extend(self._module_paths(base, dotted))
+        return [os.path.relpath(c, self.working_directory) for c in candidates if c != abs_path]
+
+    @staticmethod
+    def _module_paths(base: str, dotted: str) -> List[str]:
+        if not dotted:
+            return []
+        stem = os.path.join(base, *dotted.split("."))
+        return [p for p in (stem + ".py", os.path.join(stem, "__init__.py")) if os.path.isfile(p)]
+
+    def _resolve(self, file_path: str) -> Optional[str]:
+        abs_path = os.path.abspath(os.path.join(self.working_directory, file_path))
+        if not abs_path.startswith(self.working_directory):
+            return None
+        return abs_path
+
+    def _schedule(self, candidates: List[str]):
+        with self._lock:
+            for file_path in candidates:
+                abs_path = self._resolve(file_path)
+                if abs_path is None or abs_path in self._queued:
+                    continue
+                if len(self._queue) >= self.max_queue:
+                    break
+                self._queue.append(file_path)
+                self._queued.add(abs_path)
+                self.scheduled += 1
+
+    # ------------------------------------------------------------------
+    # Background loading
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """Drain the candidate queue in a daemon thread (call before the model request)"""
+        with self._lock:
+            if not self._queue or (self._thread and self._thread.is_alive()):
+                return
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._queue:
+                    return
+                file_path = self._queue.popleft()
+            abs_path = self._resolve(file_path)
+            try:
+                if os.path.getsize(abs_path) <= self.max_file_size:
+                    self.loaded_bytes += warm_file_cache(abs_path, file_path)
+            except OSError:
+                pass
+
+    def _counters(self) -> Dict[str, int]:
+        stats = file_cache.stats()
+        stats["scheduled"] = self.scheduled
+        return stats
+
+    def reset(self):
+        """Forget queued candidates and snapshot the counters at the start of a new request"""
+        with self._lock:
+            self._queue.clear()
+            self._queued.clear()
+        self._baseline = self._counters()
+
+    def stats_line(self) -> str:
+        """Prefetch activity since the start of the current (or last) request"""
+        stats = self._counters()
+        delta = {
+            key: stats[key] - self._baseline.get(key, 0)
+            for key in ("scheduled", "prefetched", "prefetch_hits", "prefetch_wasted_bytes")
+        }
+        prefetched = delta["prefetched"]
+        hit_rate = (delta["prefetch_hits"] / prefetched * 100) if prefetched else 0.0
+        return (
+            f"scheduled {delta['scheduled']}, loaded {prefetched} files, "
+            f"hit rate {hit_rate:.0f}% ({delta['prefetch_hits']}/{prefetched}), "
+            f"wasted {delta['prefetch_wasted_bytes']} bytes, "
+            f"unused in cache {stats['prefetch_pending_bytes']} bytes"
+        )
@@ -0,0 +1,135 @@
+"""
+Response rendering for SDX Agent
+
+Large answers are written block by block instead of being laid out as one
+Panel: fenced code goes through `Syntax`, paragraphs with markdown syntax
+through `Markdown`, and plain prose is written as-is. When stdout is not a
+terminal the text is written straight through with no styling at all.
+"""
+
+import re
+from typing import Iterable, Iterator, List, Tuple
+
+from rich.console import Console
+from rich.markdown import Markdown
+from rich.panel import Panel
+from rich.rule import Rule
+from rich.syntax import Syntax
+
+# responses shorter than this keep the framed panel
+PANEL_MAX_CHARS = 3000
+
+_FENCE = re.compile(r"^\s*(```|~~~)\s*([\w+#.-]*)")
+_MARKDOWN_LINE = re.compile(r"^\s*(#{1,6}\s|[-*+]\s|\d+[.)]\s|>|\|)")
+_MARKDOWN_INLINE = re.compile(r"\*\*|__|`|\[[^\]]+\]\([^)]+\)")
+
+# block kinds
+CODE = "code"
+MARKDOWN = "markdown"
+PLAIN = "plain"
+
+
+def _paragraph_kind(lines: List[str]) -> str:
+    for line in lines:
+        if _MARKDOWN_LINE.match(line) or _MARKDOWN_INLINE.search(line):
+            return MARKDOWN
+    return PLAIN
+
+
+def split_blocks(lines: Iterable[str]) -> Iterator[Tuple[str, str, str]]:
+    """Yield (kind, text, language) blocks as soon as each one is complete
+
+    Consecutive paragraphs of the same kind are merged so each block is
+    rendered with a single call.
+    """
+    pending_kind, pending = None, []
+    paragraph: List[str] = []
+    fence, language, code = None, "", []
+
+    def flush_paragraph():
+        nonlocal pending_kind, pending, paragraph
+        if not paragraph:
+            return None
+        kind = _paragraph_kind(paragraph)
+        out = None
+        if pending and kind != pending_kind:
+            out = (pending_kind, "\n".join(pending).strip("\n"), "")
+            pending = []
+        pending_kind = kind
+        pending.extend(paragraph + [""])
+        paragraph = []
+        return out
+
+    for line in lines:
+        line = line.rstrip("\n")
+        if fence is not None:
+            if line.strip().startswith(fence):
+                yield CODE, "\n".join(code), language or "text"
+                fence, code = None, []
+            else:
+                code.append(line)
+            continue
+        match = _FENCE.match(line)
+        if match:
+            block = flush_paragraph()
+            if block:
+                yield block
+            if pending:
+                yield pending_kind, "\n".join(pending).strip("\n"), ""
+                pending = []
+            fence, language = match.group(1), match.group(2)
+            continue
+        if line.strip():
+            paragraph.append(line)
+        else:
+            block = flush_paragraph()
+            if block:
+                yield block
+
+    if fence is not None:
+        # unterminated fence: still show it as code
+        yield CODE, "\n".join(code), language or "text"
+    block = flush_paragraph()
+    if block:
+        yield block
+    if pending:
+        yield pending_kind, "\n".join(pending).strip("\n"), ""
+
+
+class ResponseRenderer:
+    """Renders model answers incrementally, bypassing layout where it is not needed"""
+
+    def __init__(self, console: Console, accent: str = "#10B981", code_theme: str = "monokai"):
+        self.console = console
+        self.accent = accent
+        self.code_theme = code_theme
+
+    def render(self, title: str, text: str):
+        if not self.console.is_terminal:
+            # piped or redirected: no styling, no buffering
+            self.console.file.write(text if text.endswith("\n") else text + "\n")
+            self.console.file.flush()
+            return
+        if len(text) <= PANEL_MAX_CHARS:
+            self.console.print(Panel(
+                Markdown(text, code_theme=self.code_theme),
+                title=f"[{self.accent}]✓ {title}[/{self.accent}]",
+                border_style=self.accent,
+                padding=(1, 2),
+            ))
+            return
+
+        self.console.print(Rule(f"[{self.accent}]✓ {title}[/{self.accent}]", style=self.accent, align="left"))
+        for index, (kind, block, language) in enumerate(split_blocks(text.splitlines())):
+            if index:
+                self.console.line()
+            if kind == CODE:
+                # highlight only; Syntax's own layout pass (padding, cropping, wrapping) is the slow part
+                syntax = Syntax(block, language, theme=self.code_theme)
+                self.console.print(syntax.highlight(block), soft_wrap=True)
+            elif kind == MARKDOWN:
+                self.console.print(Markdown(block, code_theme=self.code_theme))
+            else:
+                self.console.out(block, highlight=False)
+            self.console.file.flush()
+        self.console.print(Rule(style=self.accent))
@@ -0,0 +1,142 @@
+"""
+Per-iteration model routing for SDX Agent
+
+Most iterations of a tool chain only decide which tool to call next, so they
+can run on a fast/lite model, while planning and the final answer go to the
+primary model. Rules are evaluated in order; the first match picks the model.
+"""
+
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+@dataclass
+class RouteContext:
+    """What the router knows about the iteration being dispatched"""
+    iteration: int
+    after_tool_results: bool = False
+    failures: int = 0
+    final_answer: bool = False
+
+
+# Named conditions usable in routing rules
+CONDITIONS: Dict[str, Callable[[RouteContext], bool]] = {
+    "first_turn": lambda ctx: ctx.iteration == 0,
+    "tool_dispatch": lambda ctx: ctx.after_tool_results,
+    "after_failure": lambda ctx: ctx.failures > 0,
+    "final_answer": lambda ctx: ctx.final_answer,
+    "default": lambda ctx: True,
+}
+
+DEFAULT_RULES = "after_failure:primary,final_answer:primary,tool_dispatch:fast,default:primary"
+# keeps the fast model's answer when a tool chain ends on it, saving a round trip
+FAST_ANSWER_RULES = "after_failure:primary,tool_dispatch:fast,default:primary"
+
+
+@dataclass
+class ModelStats:
+    """Accumulated latency and token usage for one model"""
+    calls: int = 0
+    failures: int = 0
+    latency: float = 0.0
+    prompt_tokens: int = 0
+    candidate_tokens: int = 0
+    cached_tokens: int = 0
+
+
+@dataclass
+class RoutingRule:
+    condition: str
+    target: str
+
+    def matches(self, ctx: RouteContext) -> bool:
+        return CONDITIONS[self.condition](ctx)
+
+
+def parse_rules(spec: str) -> List[RoutingRule]:
+    """Parse 'condition:target,...' where target is 'primary', 'fast' or a model name"""
+    rules = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        condition, _, target = item.partition(":")
+        condition, target = condition.strip(), target.strip()
+        if condition not in CONDITIONS:
+            raise ValueError(f"Unknown routing condition '{condition}'. Valid: {', '.join(CONDITIONS)}")
+        if not target:
+            raise ValueError(f"Routing rule '{item}' has no target model")
+        rules.append(RoutingRule(condition, target))
+    return rules
+
+
+class ModelRouter:
+    """Chooses a model per iteration and keeps per-model performance stats"""
+
+    def __init__(self, primary_model: str, fast_model: Optional[str] = None,
+                 rules: str = DEFAULT_RULES, enabled: bool = True):
+        self.primary_model = primary_model
+        self.fast_model = fast_model or primary_model
+        self.enabled = enabled and self.fast_model != self.primary_model
+        self.rules = parse_rules(rules)
+        self.stats: Dict[str, ModelStats] = {}
+        self.escalations = 0
+        # parallel workers record into the same stats
+        self._lock = threading.Lock()
+
+    def _resolve(self, target: str) -> str:
+        if target == "primary":
+            return self.primary_model
+        if target == "fast":
+            return self.fast_model
+        return target
+
+    def choose(self, ctx: RouteContext) -> Tuple[str, str]:
+        """Return (model, rule condition) for this iteration"""
+        if not self.enabled:
+            return self.primary_model, "routing disabled"
+        for rule in self.rules:
+            if rule.matches(ctx):
+                return self._resolve(rule.target), rule.condition
+        return self.primary_model, "no rule matched"
+
+    def escalate(self, model: str) -> Optional[str]:
+        """Stronger model to retry with after a failure, or None if already on it"""
+        if model == self.primary_model:
+            return None
+        with self._lock:
+            self.escalations += 1
+        return self.primary_model
+
+    def is_primary(self, model: str) -> bool:
+        return model == self.primary_model
+
+    def record(self, model: str, latency: float, usage=None, ok: bool = True):
+        with self._lock:
+            stats = self.stats.setdefault(model, ModelStats())
+            stats.calls += 1
+            stats.latency += latency
+            if not ok:
+                stats.failures += 1
+            if usage is not None:
+                stats.prompt_tokens += usage.prompt_token_count or 0
+                stats.candidate_tokens += usage.candidates_token_count or 0
+                stats.cached_tokens += usage.cached_content_token_count or 0
+
+    def report(self) -> str:
+        with self._lock:
+            stats = list(self.stats.items())
+        if not stats:
+            return "No model calls yet."
+        lines = []
+        for model, s in stats:
+            avg = s.latency / s.calls if s.calls else 0.0
+            lines.append(
+                f"{model}: {s.calls} calls ({s.failures} failed), "
+                f"avg {avg:.2f}s, total {s.latency:.2f}s, "
+                f"tokens in/out {s.prompt_tokens}/{s.candidate_tokens} "
+                f"({s.cached_tokens} cached)"
+            )
+        lines.append(f"Escalations to {self.primary_model}: {self.escalations}")
+        return "\n".join(lines)
@@ -0,0 +1,124 @@
+"""
+Compact session storage for SDX Agent
+
+Messages are held in memory as slotted records (large contents zlib-compressed)
+and persisted as an append-only JSONL file. Older messages are moved into
+compressed segments (zstd when the `zstandard` package is installed, gzip
+otherwise), and whole sessions that have gone cold are archived the same way.
+"""
+
+import io
+import os
+import gzip
+import json
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+SEGMENT_SUFFIX = ".jsonl.zst" if zstandard else ".jsonl.gz"
+COMPRESS_THRESHOLD = 4096
+
+
+class SessionMessage:
+    """One chat message; contents above COMPRESS_THRESHOLD are kept compressed"""
+
+    __slots__ = ("timestamp", "role", "_content", "metadata")
+
+    def __init__(self, timestamp: str, role: str, content: str, metadata: Optional[Dict] = None):
+        self.timestamp = timestamp
+        self.role = role
+        self.content = content
+        self.metadata = metadata or None
+
+    @property
+    def content(self) -> str:
+        data = self._content
+        return zlib.decompress(data).decode("utf-8") if isinstance(data, bytes) else data
+
+    @content.setter
+    def content(self, value: str):
+        if len(value) > COMPRESS_THRESHOLD:
+            self._content = zlib.compress(value.encode("utf-8"), 6)
+        else:
+            self._content = value
+
+    def stored_size(self) -> int:
+        return len(self._content)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "timestamp": self.timestamp,
+            "role": self.role,
+            "content": self.content,
+            "metadata": self.metadata or {},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SessionMessage":
+        return cls(data["timestamp"], data["role"], data["content"], data.get("metadata"))
+
+
+def dumps(message: SessionMessage) -> str:
+    return json.dumps(message.to_dict(), separators=(",", ":"), ensure_ascii=False)
+
+
+def open_segment(path: Path, mode: str):
+    """Open a compressed segment for text reading ('r') or writing ('w')"""
+    if str(path).endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError(f"{path} is zstd-compressed but the zstandard package is not installed")
+        if mode == "w":
+            stream = zstandard.ZstdCompressor(level=10).stream_writer(open(path, "wb"))
+        else:
+            stream = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"))
+        return io.TextIOWrapper(stream, encoding="utf-8")
+    return gzip.open(path, mode + "t", encoding="utf-8", compresslevel=6)
+
+
+def write_segment(path: Path, messages: Iterable[SessionMessage]):
+    tmp = path.with_name(path.name + ".tmp")
+    with open_segment(tmp, "w") as f:
+        for message in messages:
+            f.write(dumps(message) + "\n")
+    os.replace(tmp, path)
+
+
+def read_jsonl(lines: Iterable[str]) -> Iterator[SessionMessage]:
+    for line in lines:
+        line = line.strip()
+        if line:
+            yield SessionMessage.from_dict(json.loads(line))
+
+
+def read_segment(path: Path) -> Iterator[SessionMessage]:
+    with open_segment(path, "r") as f:
+        yield from read_jsonl(f)
+
+
+def archive_cold_sessions(session_dir: Path, max_age_hours: float, exclude: Optional[Path] = None) -> List[Path]:
+    """Compress whole session files not modified for max_age_hours"""
+    archived = []
+    cutoff = time.time() - max_age_hours * 3600
+    for path in list(session_dir.glob("session_*.json")) + list(session_dir.glob("session_*.jsonl")):
+        if path == exclude or path.stat().st_mtime > cutoff:
+            continue
+        try:
+            with open(path, "r") as f:
+                if path.suffix == ".json":
+                    # legacy format: one indented JSON array
+                    messages = [SessionMessage.from_dict(m) for m in json.load(f)]
+                else:
+                    messages = list(read_jsonl(f))
+            target = path.with_name(path.stem + ".archive" + SEGMENT_SUFFIX)
+            write_segment(target, messages)
+            path.unlink()
+            archived.append(target)
+        except (OSError, ValueError, KeyError):
+            continue
+    return archived
@@ -0,0 +1,255 @@
+"""
+Persistent Python symbol index for SDX Agent
+
+Definitions, references, imports and signatures are extracted with `ast`,
+in a process pool when many files changed, and stored in the cache dir.
+Each refresh only re-parses files whose mtime or size changed, so lookups
+stay in the millisecond range once the index is warm.
+"""
+
+import os
+import ast
+import json
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple
+
+from config import active_config
+
+INDEX_VERSION = 3
+SKIP_DIRS = {"__pycache__", "node_modules", "venv", ".venv", "env", "build", "dist", "site-packages"}
+POOL_THRESHOLD = 16  # below this many changed files parsing inline beats pool startup
+RESCAN_INTERVAL = 2.0
+
+
+def _pool_context():
+    """Start method for the parse pool
+
+    The agent runs spinner, prefetch and sampler threads, and a forked child
+    can inherit a lock one of them holds, so fork is avoided where possible.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def _signature(node) -> str:
+    if isinstance(node, ast.ClassDef):
+        bases = ", ".join(ast.unparse(b) for b in node.bases)
+        return f"class {node.name}({bases})" if bases else f"class {node.name}"
+    prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+    returns = f" -> {ast.unparse(node.returns)}" if node.returns else ""
+    return f"{prefix} {node.name}({ast.unparse(node.args)}){returns}"
+
+
+class _Collector(ast.NodeVisitor):
+    def __init__(self):
+        self.scope: List[Tuple[str, str]] = []  # (name, kind) of enclosing definitions
+        self.defs: List[list] = []
+        self.refs: List[list] = []
+        self.imports: List[list] = []
+
+    def _define(self, node, kind: str):
+        qualname = ".".join([name for name, _ in self.scope] + [node.name])
+        self.defs.append([node.name, kind, node.lineno, qualname, _signature(node)])
+        self.scope.append((node.name, kind))
+        self.generic_visit(node)
+        self.scope.pop()
+
+    def visit_ClassDef(self, node):
+        self._define(node, "class")
+
+    def visit_FunctionDef(self, node):
+        in_class = bool(self.scope) and self.scope[-1][1] == "class"
+        self._define(node, "method" if in_class else "function")
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Assign(self, node):
+        if not self.scope:
+            for target in node.targets:
+                if isinstance(target, ast.Name):
+                    self.defs.append([target.id, "variable", node.lineno, target.id, ""])
+        self.generic_visit(node)
+
+    def visit_AnnAssign(self, node):
+        if not self.scope and isinstance(node.target, ast.Name):
+            name = node.target.id
+            self.defs.append([name, "variable", node.lineno, name, f"{name}: {ast.unparse(node.annotation)}"])
+        self.generic_visit(node)
+
+    def visit_Import(self, node):
+        for alias in node.names:
+            self.imports.append([alias.name, "", alias.asname or "", node.lineno])
+
+    def visit_ImportFrom(self, node):
+        module = "." * node.level + (node.module or "")
+        for alias in node.names:
+            self.imports.append([module, alias.name, alias.asname or "", node.lineno])
+            self.refs.append([alias.name, node.lineno])
+
+    def visit_Name(self, node):
+        if isinstance(node.ctx, ast.Load):
+            self.refs.append([node.id, node.lineno])
+
+    def visit_Attribute(self, node):
+        if isinstance(node.ctx, ast.Load):
+            self.refs.append([node.attr, node.lineno])
+        self.generic_visit(node)
+
+
+def parse_file(abs_path: str) -> Optional[Dict]:
+    """Extract symbols from one file (runs in worker processes)"""
+    try:
+        with open(abs_path, "rb") as f:
+            tree = ast.parse(f.read(), filename=abs_path)
+    except (OSError, SyntaxError, ValueError):
+        return None
+    collector = _Collector()
+    collector.visit(tree)
+    return {"defs": collector.defs, "refs": collector.refs, "imports": collector.imports}
+
+
+class SymbolIndex:
+    """Incrementally maintained symbol index for one workspace"""
+
+    def __init__(self, root: str = ".", index_file: str = ".cache/symbol_index.json",
+                 max_workers: Optional[int] = None):
+        self.root = os.path.abspath(root)
+        self.index_file = os.path.join(self.root, index_file)
+        self.max_workers = max_workers
+        self.files: Dict[str, Dict] = {}
+        self._defs_by_name: Dict[str, List[Tuple[str, list]]] = {}
+        self._refs_by_name: Dict[str, List[Tuple[str, int]]] = {}
+        self._last_scan = 0.0
+        self._lock = threading.Lock()
+        self.last_refresh_stats = ""
+        self._load()
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def _load(self):
+        try:
+            with open(self.index_file, "r") as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION:
+                self.files = data["files"]
+        except (OSError, ValueError, KeyError):
+            self.files = {}
+        self._rebuild_maps()
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.index_file), exist_ok=True)
+        tmp = self.index_file + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"version": INDEX_VERSION, "files": self.files}, f, separators=(",", ":"))
+        os.replace(tmp, self.index_file)
+
+    def _rebuild_maps(self):
+        defs: Dict[str, List[Tuple[str, list]]] = {}
+        refs: Dict[str, List[Tuple[str, int]]] = {}
+        for rel, record in self.files.items():
+            for d in record["defs"]:
+                defs.setdefault(d[0], []).append((rel, d))
+            for name, line in record["refs"]:
+                refs.setdefault(name, []).append((rel, line))
+        self._defs_by_name = defs
+        self._refs_by_name = refs
+
+    # ------------------------------------------------------------------
+    # Incremental refresh
+    # ------------------------------------------------------------------
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        found = {}
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS and not d.startswith(".")]
+            for filename in filenames:
+                if filename.endswith(".py"):
+                    abs_path = os.path.join(dirpath, filename)
+                    try:
+                        st = os.stat(abs_path)
+                    except OSError:
+                        continue
+                    found[os.path.relpath(abs_path, self.root)] = (st.st_mtime_ns, st.st_size)
+        return found
+
+    def refresh(self, force: bool = False):
+        """Re-parse files whose mtime or size changed since the last scan"""
+        with self._lock:
+            if not force and time.monotonic() - self._last_scan < RESCAN_INTERVAL:
+                return
+            started = time.perf_counter()
+            found = self._scan()
+            removed = [rel for rel in self.files if rel not in found]
+            changed = [
+                rel for rel, key in found.items()
+                if rel not in self.files or tuple(self.files[rel]["key"]) != key
+            ]
+            for rel in removed:
+                del self.files[rel]
+
+            paths = [os.path.join(self.root, rel) for rel in changed]
+            if len(paths) >= POOL_THRESHOLD:
+                try:
+                    with ProcessPoolExecutor(max_workers=self.max_workers, mp_context=_pool_context()) as pool:
+                        parsed = list(pool.map(parse_file, paths, chunksize=32))
+                except (BrokenProcessPool, OSError):
+                    # e.g. the main module cannot be re-imported by the server process
+                    parsed = [parse_file(p) for p in paths]
+            else:
+                parsed = [parse_file(p) for p in paths]
+            for rel, record in zip(changed, parsed):
+                if record is None:
+                    record = {"defs": [], "refs": [], "imports": []}
+                record["key"] = list(found[rel])
+                self.files[rel] = record
+
+            if changed or removed:
+                self._rebuild_maps()
+                self._save()
+            self._last_scan = time.monotonic()
+            self.last_refresh_stats = (
+                f"{len(self.files)} files indexed, {len(changed)} re-parsed, "
+                f"{len(removed)} removed in {time.perf_counter() - started:.2f}s"
+            )
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def find_definition(self, name: str) -> List[Tuple[str, list]]:
+        """Definitions matching a bare name or a dotted qualname suffix (e.g. Class.method)"""
+        self.refresh()
+        short = name.rsplit(".", 1)[-1]
+        return [
+            (rel, d) for rel, d in self._defs_by_name.get(short, [])
+            if d[3] == name or d[3].endswith("." + name) or name == short
+        ]
+
+    def find_references(self, name: str) -> List[Tuple[str, int]]:
+        self.refresh()
+        return sorted(self._refs_by_name.get(name.rsplit(".", 1)[-1], []))
+
+    def outline(self, file_path: str) -> Optional[Dict]:
+        self.refresh()
+        rel = os.path.relpath(os.path.abspath(os.path.join(self.root, file_path)), self.root)
+        return self.files.get(rel)
+
+
+_indexes: Dict[str, SymbolIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(root: str = ".") -> SymbolIndex:
+    """Shared index per workspace root"""
+    root = os.path.abspath(root)
+    with _indexes_lock:
+        if root not in _indexes:
+            index_file = os.path.join(active_config().cache_dir, "symbol_index.json")
+            _indexes[root] = SymbolIndex(root, index_file=index_file)
+        return _indexes[root]
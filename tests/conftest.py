@@ -0,0 +1,77 @@
+"""
+Shared test setup: make the top-level modules importable from tests/, keep
+the developer's environment out of Config, and build agents on a fake client
+"""
+
+import io
+import logging
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.genai import types
+
+import config as config_module
+from context_cache import LocalCacheBackend
+
+
+def response(text=None, calls=()):
+    """GenerateContentResponse with either a text answer or function calls"""
+    if calls:
+        parts = [types.Part(function_call=types.FunctionCall(name=name, args=args)) for name, args in calls]
+    else:
+        parts = [types.Part(text=text)]
+    return types.GenerateContentResponse(
+        candidates=[types.Candidate(content=types.Content(role="model", parts=parts))],
+        usage_metadata=types.GenerateContentResponseUsageMetadata(
+            prompt_token_count=10, candidates_token_count=2, total_token_count=12,
+        ),
+    )
+
+
+class ScriptedModels:
+    """Returns scripted responses in order and records the models asked"""
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.calls = []
+        self.contents = []
+
+    def generate_content(self, *, model, contents, config=None):
+        self.calls.append(model)
+        self.contents.append(list(contents))
+        return self.script.pop(0)
+
+
+class ScriptedClient:
+    def __init__(self, script=()):
+        self.models = ScriptedModels(script)
+        self.caches = LocalCacheBackend()
+
+
+@pytest.fixture(autouse=True)
+def clean_environment(monkeypatch):
+    for env in list(config_module.ENV_VARS) + ["PROFILE", "GEMINI_API_KEY"]:
+        monkeypatch.delenv(env, raising=False)
+    # SDXAgent.apply_config installs a process-wide config for the tools
+    monkeypatch.setattr(config_module, "_active_config", None)
+
+
+@pytest.fixture
+def make_agent(tmp_path, monkeypatch):
+    """Build an SDXAgent in tmp_path whose model calls come from a script"""
+    import main
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(main, "logger", logging.getLogger("sdx-tests"))
+
+    def build(script=(), **settings):
+        config = config_module.Config(gemini_api_key="test", **settings)
+        agent = main.SDXAgent(config=config, client=ScriptedClient(script))
+        agent.ui.console.file = io.StringIO()
+        return agent
+
+    return build
@@ -0,0 +1,125 @@
+"""
+Tool-output compaction: trimming and eliding by tool turn
+"""
+
+from google.genai import types
+
+from conftest import response
+
+from compaction import CompactionPolicy, ToolOutputCompactor, _trim, scaled_policies
+
+
+def call(name: str, **args) -> types.FunctionCall:
+    return types.FunctionCall(name=name, args=args)
+
+
+def result(name: str, text: str) -> types.Content:
+    return types.Content(
+        role="tool",
+        parts=[types.Part.from_function_response(name=name, response={"result": text})],
+    )
+
+
+def sent_text(message: types.Content) -> str:
+    return message.parts[0].function_response.response["result"]
+
+
+def run_turn(compactor, messages, turn: int, paths):
+    """One model response calling get_file_content once per path"""
+    compactor.begin_turn(turn)
+    for path in paths:
+        compactor.add(messages, call("get_file_content", file_path=path), result("get_file_content", f"contents of {path}"))
+
+
+def test_parallel_calls_in_one_turn_are_kept_together():
+    compactor = ToolOutputCompactor(keep_recent=2)
+    messages = [types.Content(role="user", parts=[types.Part(text="task")])]
+
+    run_turn(compactor, messages, 0, ["a.py", "b.py", "c.py"])
+    compactor.elide_older(messages)
+    assert [sent_text(m) for m in messages[1:]] == [
+        "contents of a.py", "contents of b.py", "contents of c.py",
+    ]
+
+    run_turn(compactor, messages, 1, ["d.py", "e.py", "f.py"])
+    compactor.elide_older(messages)
+    # two tool turns, six outputs: nothing has aged out yet
+    assert not any("elided" in sent_text(m) for m in messages[1:])
+
+    run_turn(compactor, messages, 2, ["g.py"])
+    compactor.elide_older(messages)
+    texts = [sent_text(m) for m in messages[1:]]
+    assert all("elided" in text and "expand_tool_output(ref=" in text for text in texts[:3])
+    assert texts[3:] == [
+        "contents of d.py", "contents of e.py", "contents of f.py", "contents of g.py",
+    ]
+
+
+def test_expanded_output_belongs_to_the_turn_that_expanded_it():
+    compactor = ToolOutputCompactor(keep_recent=1)
+    messages = []
+    run_turn(compactor, messages, 0, ["a.py"])
+    run_turn(compactor, messages, 1, ["b.py"])
+    compactor.elide_older(messages)
+    assert "elided" in sent_text(messages[0])
+
+    compactor.begin_turn(2)
+    compactor.add_expansion(messages, call("expand_tool_output", ref=1))
+    compactor.elide_older(messages)
+    assert sent_text(messages[-1]) == "contents of a.py"
+    assert "elided" in sent_text(messages[1])
+
+
+def test_keep_recent_zero_elides_everything():
+    compactor = ToolOutputCompactor(keep_recent=0)
+    messages = []
+    run_turn(compactor, messages, 0, ["a.py", "b.py"])
+    compactor.elide_older(messages)
+    assert all("elided" in sent_text(m) for m in messages)
+
+
+def test_trim_keeps_head_and_tail():
+    text = "h" * 50 + "m" * 100 + "t" * 50
+    trimmed = _trim(text, CompactionPolicy(max_chars=120, head_chars=50, tail_chars=50))
+    assert trimmed.startswith("h" * 50) and trimmed.endswith("t" * 50)
+    assert "[... 100 characters omitted ...]" in trimmed
+
+
+def test_trim_with_zero_tail_is_shorter_than_the_input():
+    text = "x" * 1000
+    trimmed = _trim(text, CompactionPolicy(max_chars=100, head_chars=80, tail_chars=0))
+    assert len(trimmed) < len(text)
+    assert trimmed.startswith("x" * 80)
+    assert trimmed.endswith("[... 920 characters omitted ...]\n")
+
+
+def test_small_scale_policies_still_shrink_output():
+    policies = scaled_policies(0.01)
+    assert policies["run_python_file"].tail_chars == 20
+    assert scaled_policies(0.0003)["run_python_file"].tail_chars == 0
+    compactor = ToolOutputCompactor(scaled_policies(0.0003))
+    text = "\n".join(f"output line {i}" for i in range(2000))
+    assert len(compactor.compact_text("run_python_file", text)) < len(text)
+
+
+def test_file_read_after_its_output_was_elided_is_sent_in_full(make_agent, tmp_path):
+    (tmp_path / "a.py").write_text("VALUE = 1\n")
+    agent = make_agent([
+        response(calls=[("get_file_content", {"file_path": "a.py"})]),
+        response(calls=[("write_file", {"file_path": "b.py", "content": "pass\n"})]),
+        response(calls=[("get_files_info", {})]),
+        response(calls=[("get_file_content", {"file_path": "a.py"})]),
+        response(text="done"),
+    ], enable_routing=False, compaction_keep_recent=2)
+
+    agent.process_request("read a.py twice")
+
+    last_request = agent.client.models.contents[-1]
+    reads = [
+        message.parts[0].function_response.response["result"]
+        for message in last_request
+        if message.role == "tool" and message.parts[0].function_response.name == "get_file_content"
+    ]
+    assert "elided" in reads[0]
+    # the first read is out of context, so the second one must carry the text, not an "unchanged" note
+    assert reads[1] == "VALUE = 1\n"
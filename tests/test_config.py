@@ -0,0 +1,85 @@
+"""
+Profiles, single-field changes and applying a config to a running agent
+"""
+
+import pytest
+
+from config import Config, PROFILES
+
+
+def test_switching_profiles_is_absolute():
+    thorough = Config(gemini_api_key="k").with_profile("thorough")
+    assert (thorough.model_name, thorough.timeout, thorough.max_iterations) == ("gemini-2.5-pro", 900, 40)
+
+    default = thorough.with_profile("default")
+    assert default == Config(gemini_api_key="k")
+
+    low_cost = thorough.with_profile("low-cost")
+    assert low_cost == Config(gemini_api_key="k", profile="low-cost", **PROFILES["low-cost"])
+    assert low_cost.timeout == 300 and low_cost.temperature == 0.7
+
+
+def test_environment_overrides_every_profile(monkeypatch):
+    monkeypatch.setenv("MAX_ITERATIONS", "7")
+    monkeypatch.setenv("ENABLE_PREFETCH", "true")
+    config = Config(gemini_api_key="k")
+    for name in PROFILES:
+        switched = config.with_profile(name)
+        assert switched.profile == name
+        assert switched.max_iterations == 7
+        assert switched.enable_prefetch is True
+
+
+def test_from_env_applies_profile_then_variables(monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "k")
+    monkeypatch.setenv("PROFILE", "thorough")
+    monkeypatch.setenv("TIMEOUT", "60")
+    config = Config.from_env()
+    assert (config.profile, config.model_name, config.timeout) == ("thorough", "gemini-2.5-pro", 60)
+
+
+def test_unknown_profile_and_setting_are_rejected():
+    config = Config(gemini_api_key="k")
+    with pytest.raises(ValueError):
+        config.with_profile("fastest")
+    with pytest.raises(ValueError):
+        config.with_value("no_such_field", "1")
+    with pytest.raises(ValueError):
+        config.with_value("gemini_api_key", "other")
+    with pytest.raises(ValueError, match="/config profile"):
+        config.with_value("profile", "thorough")
+
+
+def test_boolean_settings_accept_only_known_spellings():
+    config = Config(gemini_api_key="k")
+    assert config.with_value("enable_routing", "off").enable_routing is False
+    assert config.with_value("enable_routing", "Yes").enable_routing is True
+    with pytest.raises(ValueError, match="enable_routing"):
+        config.with_value("enable_routing", "flase")
+
+
+def test_bad_routing_rules_are_rejected_before_they_are_stored():
+    config = Config(gemini_api_key="k")
+    with pytest.raises(ValueError, match="Unknown routing condition"):
+        config.with_value("routing_rules", "bogus:fast")
+    assert config.with_value("routing_rules", "default:fast").routing_rules == "default:fast"
+
+
+def test_bad_config_command_leaves_the_agent_unchanged(make_agent):
+    agent = make_agent()
+    before = agent.config
+    rules = agent.router.rules
+
+    reply = agent.config_command("set routing_rules bogus:fast")
+    assert reply.startswith("Config error")
+    assert agent.config_command("set enable_caching maybe").startswith("Config error")
+    assert agent.config is before and agent.router.rules is rules
+
+    # later changes still apply
+    assert "max_iterations = 5" in agent.config_command("set max_iterations 5")
+    assert agent.max_iterations == 5
+    agent.config_command("profile thorough")
+    assert agent.router.primary_model == "gemini-2.5-pro"
+    agent.config_command("profile default")
+    assert agent.router.primary_model == "gemini-2.5-flash"
+    assert agent.max_iterations == 20
@@ -0,0 +1,107 @@
+"""
+ContextCache create / refresh / expiry against LocalCacheBackend
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from google.genai import types
+
+from context_cache import ContextCache, LocalCacheBackend
+
+MODEL = "gemini-2.5-flash"
+
+
+def make_cache(backend=None, **kwargs) -> ContextCache:
+    return ContextCache(
+        backend=backend or LocalCacheBackend(),
+        system_instruction="You are a test agent.",
+        tools=[types.Tool(function_declarations=[])],
+        temperature=0.7,
+        **kwargs,
+    )
+
+
+def expire_in(cache: ContextCache, seconds: float):
+    """Move the local entry's expiry, as if time had passed"""
+    entry = cache._entries[MODEL]
+    cache._entries[MODEL] = entry.model_copy(update={
+        "expire_time": datetime.now(timezone.utc) + timedelta(seconds=seconds),
+    })
+
+
+def test_creates_one_cache_per_model_and_reuses_it():
+    backend = LocalCacheBackend()
+    cache = make_cache(backend)
+
+    config = cache.config_for(MODEL)
+    assert cache.config_for(MODEL) is config
+    assert len(backend.store) == 1
+    name = next(iter(backend.store))
+    assert config.cached_content == name
+    assert config.temperature == 0.7
+    # the static prefix lives in the cache, not in every request
+    assert config.system_instruction is None and config.tools is None
+
+    cache.config_for("gemini-2.5-flash-lite")
+    assert len(backend.store) == 2
+    assert cache.refreshes == 0
+
+
+def test_refreshes_ttl_before_expiry():
+    backend = LocalCacheBackend()
+    cache = make_cache(backend, ttl_seconds=3600, refresh_margin=300)
+    name = cache.config_for(MODEL).cached_content
+
+    expire_in(cache, 600)
+    cache.config_for(MODEL)
+    assert cache.refreshes == 0
+
+    expire_in(cache, 60)
+    config = cache.config_for(MODEL)
+    assert cache.refreshes == 1
+    assert config.cached_content == name
+    remaining = cache._entries[MODEL].expire_time - datetime.now(timezone.utc)
+    assert remaining > timedelta(seconds=3500)
+    assert backend.store[name].expire_time == cache._entries[MODEL].expire_time
+
+
+def test_recreates_cache_that_expired_server_side():
+    backend = LocalCacheBackend()
+    cache = make_cache(backend)
+    old_name = cache.config_for(MODEL).cached_content
+
+    expire_in(cache, -10)
+    backend.store.clear()
+    config = cache.config_for(MODEL)
+
+    assert config.cached_content != old_name
+    assert config.cached_content in backend.store
+    assert cache.refreshes == 1
+
+
+def test_falls_back_inline_when_caching_is_refused():
+    class RefusingBackend(LocalCacheBackend):
+        def create(self, *, model, config=None):
+            raise ValueError("cached content is too small")
+
+    cache = make_cache(RefusingBackend())
+    config = cache.config_for(MODEL)
+    assert config is cache.inline_config
+    assert config.system_instruction == "You are a test agent."
+    assert MODEL in cache.report()
+
+
+def test_disabled_cache_never_touches_backend():
+    backend = LocalCacheBackend()
+    cache = make_cache(backend, enabled=False)
+    assert cache.config_for(MODEL) is cache.inline_config
+    assert backend.store == {}
+
+
+def test_close_deletes_created_caches():
+    backend = LocalCacheBackend()
+    cache = make_cache(backend)
+    cache.config_for(MODEL)
+    cache.close()
+    assert backend.store == {}
+    assert cache._entries == {}
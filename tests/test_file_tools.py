@@ -0,0 +1,46 @@
+"""
+File listing and sniffing around special files
+"""
+
+import os
+import threading
+
+import pytest
+
+from func.get_files_info import get_files_info
+from func.sniff import sniff_file
+
+
+def run_with_timeout(fn, *args, timeout=5):
+    """Call fn in a thread so a blocking open fails the test instead of hanging it"""
+    result = {}
+
+    def target():
+        try:
+            result["value"] = fn(*args)
+        except Exception as e:
+            result["error"] = e
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), f"{fn.__name__} blocked"
+    if "error" in result:
+        raise result["error"]
+    return result["value"]
+
+
+@pytest.mark.skipif(not hasattr(os, "mkfifo"), reason="needs named pipes")
+def test_listing_does_not_open_fifos(tmp_path):
+    (tmp_path / "notes.txt").write_text("hello\n")
+    (tmp_path / "blob.bin").write_bytes(b"\x00\x01\x02")
+    os.mkfifo(tmp_path / "pipe")
+
+    listing = run_with_timeout(get_files_info, str(tmp_path))
+    lines = {line.split()[1]: line for line in listing.splitlines()}
+    assert lines["pipe"].endswith("type: special")
+    assert lines["notes.txt"].endswith("type: text")
+    assert lines["blob.bin"].endswith("type: binary")
+
+    with pytest.raises(OSError):
+        run_with_timeout(sniff_file, str(tmp_path / "pipe"))
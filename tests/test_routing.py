@@ -0,0 +1,41 @@
+"""
+Which model writes the final answer of a routed tool chain
+"""
+
+from conftest import response
+
+from config import Config, PROFILES
+
+PRIMARY, FAST = "gemini-2.5-flash", "gemini-2.5-flash-lite"
+
+
+def tool_chain():
+    return [
+        response(calls=[("get_files_info", {})]),
+        response(calls=[("get_files_info", {"directory": "."})]),
+        response(text="draft from the fast model"),
+        response(text="final answer"),
+    ]
+
+
+def test_primary_model_writes_the_final_answer_by_default(make_agent):
+    agent = make_agent(tool_chain())
+    agent.process_request("look around")
+    assert agent.client.models.calls == [PRIMARY, FAST, FAST, PRIMARY]
+    assert agent.session.history[-1].content == "final answer"
+
+
+def test_fast_answer_profiles_keep_the_fast_models_answer(make_agent):
+    settings = dict(PROFILES["low-latency"], model_name=PRIMARY, fast_model_name=FAST)
+    agent = make_agent(tool_chain(), **settings)
+    agent.process_request("look around")
+    assert agent.client.models.calls == [PRIMARY, FAST, FAST]
+    assert agent.session.history[-1].content == "draft from the fast model"
+
+
+def test_profiles_opting_out_of_final_answer_rule():
+    config = Config(gemini_api_key="k")
+    assert "final_answer:primary" in config.routing_rules
+    for name in ("low-latency", "low-cost"):
+        assert "final_answer" not in config.with_profile(name).routing_rules
+    assert "final_answer:primary" in config.with_profile("thorough").routing_rules
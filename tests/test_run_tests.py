@@ -0,0 +1,87 @@
+"""
+run_tests output parsing, collection errors and failed_only re-runs
+"""
+
+import textwrap
+
+import pytest
+
+from func.run_tests import _parse, run_tests
+from func.sandbox import limited_command
+
+SUMMARY = textwrap.dedent("""\
+    ..F.F
+    =========================== short test summary info ============================
+    FAILED test_p.py::test_p[a b] - assert 'a b' == 'x'
+    FAILED test_p.py::test_p[c - d] - assert 1 == 2
+    FAILED test_q.py::TestQ::test_plain - ValueError: boom - again
+    ERROR test_broken.py - ModuleNotFoundError: No module named 'missing'
+    ERROR test_r.py::test_fixture
+    2 failed, 3 passed, 1 error in 0.12s
+    """)
+
+
+def test_parse_keeps_parametrized_ids_with_spaces():
+    counts, failures = _parse(SUMMARY)
+    assert counts == {"failed": 2, "passed": 3, "errors": 1}
+    assert failures == [
+        ("FAILED", "test_p.py::test_p[a b]", "assert 'a b' == 'x'"),
+        ("FAILED", "test_p.py::test_p[c - d]", "assert 1 == 2"),
+        ("FAILED", "test_q.py::TestQ::test_plain", "ValueError: boom - again"),
+        ("ERROR", "test_broken.py", "ModuleNotFoundError: No module named 'missing'"),
+        ("ERROR", "test_r.py::test_fixture", ""),
+    ]
+
+
+@pytest.fixture
+def project(tmp_path):
+    (tmp_path / "test_broken.py").write_text("import missing_module_for_sdx_tests\n")
+    (tmp_path / "test_one.py").write_text(textwrap.dedent("""\
+        import pytest
+
+        @pytest.mark.parametrize("value", ["a b", "c"])
+        def test_param(value):
+            assert value == "c"
+        """))
+    (tmp_path / "test_two.py").write_text("def test_fails():\n    assert 1 == 2\n\ndef test_ok():\n    pass\n")
+    return tmp_path
+
+
+def test_collection_error_does_not_hide_other_failures(project):
+    report = run_tests(str(project), shards=1)
+    assert "across 1 shard(s)\n" in report
+    assert "ERROR test_broken.py" in report
+    assert "FAILED test_one.py::test_param[a b]" in report
+    assert "FAILED test_two.py::test_fails" in report
+    assert "incomplete" not in report
+
+    rerun = run_tests(str(project), failed_only=True, shards=1)
+    # every recorded node id must exist, including the one with a space
+    assert "not found" not in rerun and "no tests ran" not in rerun
+    assert "FAILED test_one.py::test_param[a b]" in rerun
+    assert "FAILED test_two.py::test_fails" in rerun
+    assert "test_ok" not in rerun
+
+
+def test_aborted_shard_is_reported_incomplete(project):
+    (project / "conftest.py").write_text(
+        "def pytest_collection_finish(session):\n    raise SystemExit(3)\n"
+    )
+    report = run_tests(str(project), targets=["test_two.py"], shards=1)
+    assert "1 incomplete" in report
+    assert "shard 1 incomplete (exit 3" in report
+    assert "failed_only=true" in report
+
+
+def test_limited_command_applies_limits_in_the_child():
+    resource = pytest.importorskip("resource")
+    import subprocess
+    import sys
+
+    code = "import resource; print(resource.getrlimit(resource.RLIMIT_CPU)[0])"
+    output = subprocess.run(
+        limited_command([sys.executable, "-c", code], cpu_seconds=7, memory_mb=0),
+        capture_output=True, text=True, check=True,
+    )
+    assert output.stdout.strip() == "7"
+    assert resource.getrlimit(resource.RLIMIT_CPU)[0] != 7
@@ -0,0 +1,23 @@
+"""
+Symbol index coverage of module-level definitions
+"""
+
+from symbol_index import SymbolIndex
+
+
+def test_annotated_module_assignments_are_indexed(tmp_path):
+    (tmp_path / "settings.py").write_text(
+        "from typing import Dict\n"
+        "PROFILES: Dict[str, int] = {}\n"
+        "LIMIT = 3\n"
+        "class Config:\n"
+        "    name: str = ''\n"
+    )
+    index = SymbolIndex(str(tmp_path))
+
+    [(rel, definition)] = index.find_definition("PROFILES")
+    assert rel == "settings.py"
+    assert definition[:3] == ["PROFILES", "variable", 2]
+    assert definition[4] == "PROFILES: Dict[str, int]"
+    assert index.find_definition("LIMIT")
+    assert not index.find_definition("name")
@@ -0,0 +1,111 @@
+"""
+Recording a parallel request and replaying the trace
+"""
+
+import json
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+from conftest import response
+
+import traces
+from trace_channels import trace_channel
+from traces import load_workload, read_trace, replay
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+class ParallelModels:
+    """Answers by prompt, so concurrent workers get consistent responses"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+
+    def generate_content(self, *, model, contents, config=None):
+        prompt = contents[0].parts[0].text
+        if prompt.startswith("Task:"):
+            plan = [{"description": f"summarize {name}", "files": [name]} for name in ("a.txt", "b.txt")]
+            return response(text=json.dumps(plan))
+        if prompt.startswith("The task"):
+            return response(text="merged report")
+        if prompt.startswith("You are worker"):
+            worker = int(prompt.split()[3])
+            time.sleep(0.02)  # let the workers overlap
+            if len(contents) == 1:
+                return response(calls=[("get_file_content", {"file_path": "ab"[worker - 1] + ".txt"})])
+            return response(text=f"worker {worker} done")
+        if len(contents) == 1:
+            return response(calls=[("get_files_info", {})])
+        return response(text="single answer")
+
+
+def record_workload(make_agent, tmp_path):
+    """Record a parallel and a single request; returns the trace and a fresh copy of the tree"""
+    for directory in (tmp_path, tmp_path / "fixture"):
+        directory.mkdir(exist_ok=True)
+        (directory / "a.txt").write_text("alpha\n")
+        (directory / "b.txt").write_text("beta\n")
+    agent = make_agent(record_trace=True, trace_dir=str(tmp_path / "traces"), max_workers=2)
+    agent.client.models = ParallelModels()
+
+    agent.process_parallel("summarize the files")
+    agent.process_request("list the files")
+    agent.tracer.close()
+    return agent.tracer.path, tmp_path / "fixture"
+
+
+def test_parallel_request_replays_without_divergence(make_agent, tmp_path):
+    recorded, fixture = record_workload(make_agent, tmp_path)
+    records = list(read_trace(recorded))
+    assert [r["mode"] for r in records if r["type"] == "request"] == ["parallel", "single"]
+    assert sum(r["type"] == "end" for r in records) == 2
+    _, inputs, responses = load_workload(recorded)
+    assert sorted(responses) == ["main", "merge", "plan", "worker:1", "worker:2"]
+    assert [len(responses[c]) for c in ("plan", "worker:1", "worker:2", "merge", "main")] == [1, 2, 2, 1, 3]
+
+    out = replay(recorded, tmp_path / "replay.jsonl.gz", workdir=fixture)
+    replay_inputs, replay_responses = load_workload(out)[1:]
+    assert replay_inputs == inputs
+    assert replay_responses == responses
+
+    def tool_calls(trace_records):
+        # the recording directory also held sessions/ and traces/, so listings differ
+        return sorted(
+            (r["name"], r["result"] if r["name"] == "get_file_content" else "")
+            for r in trace_records if r["type"] == "tool"
+        )
+
+    assert tool_calls(read_trace(out)) == tool_calls(records) == [
+        ("get_file_content", "alpha\n"), ("get_file_content", "beta\n"), ("get_files_info", ""),
+    ]
+
+
+def test_replay_command_line_serves_parallel_channels(make_agent, tmp_path):
+    # the CLI runs traces as __main__, next to the copy imported by main and orchestrator
+    recorded, fixture = record_workload(make_agent, tmp_path)
+    out = tmp_path / "cli.jsonl.gz"
+    result = subprocess.run(
+        [sys.executable, str(REPO_ROOT / "traces.py"), "replay", str(recorded),
+         "--workdir", str(fixture), "--out", str(out)],
+        cwd=tmp_path, capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+    assert "diverged" not in result.stdout + result.stderr
+    assert load_workload(out)[1:] == load_workload(recorded)[1:]
+
+
+def test_replay_client_serves_each_channel_in_order():
+    client = traces.ReplayClient({
+        "main": [("m", response(text="main 1").model_dump(mode="json"), None)],
+        "worker:1": [("m", response(text="w1 a").model_dump(mode="json"), None),
+                     ("m", response(text="w1 b").model_dump(mode="json"), None)],
+    })
+    with trace_channel("worker:1"):
+        assert client.models.generate_content(model="m", contents=[]).text == "w1 a"
+    assert client.models.generate_content(model="m", contents=[]).text == "main 1"
+    with trace_channel("worker:1"):
+        assert client.models.generate_content(model="m", contents=[]).text == "w1 b"
+    assert client.models.remaining() == 0
@@ -0,0 +1,33 @@
+"""
+Per-thread trace channels for SDX Agent model calls
+
+A channel names the conversation a model call belongs to: the main loop, or
+the planner, a worker or the merge of a parallel request. `TraceRecorder`
+stores it with each model record and `ReplayClient` serves responses per
+channel. The state lives here rather than in `traces` so that
+`python traces.py replay`, where `traces` also runs as `__main__`, shares
+one channel with the orchestrator instead of reading a second copy.
+"""
+
+import threading
+from contextlib import contextmanager
+
+MAIN_CHANNEL = "main"
+
+# the conversation a model call belongs to, per thread
+_channel = threading.local()
+
+
+def current_channel() -> str:
+    return getattr(_channel, "name", MAIN_CHANNEL)
+
+
+@contextmanager
+def trace_channel(name: str):
+    """Attribute model calls made by this thread to a channel (e.g. "worker:2")"""
+    previous = current_channel()
+    _channel.name = name
+    try:
+        yield
+    finally:
+        _channel.name = previous
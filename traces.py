@@ -0,0 +1,379 @@
+"""
+Record/replay traces for offline performance comparison of SDX Agent builds
+
+`TraceRecorder` writes a gzip-compressed JSONL trace of each request: the
+model responses, tool calls with their results, per-stage timings and byte
+counts, and memory at the end of the request. `replay()` runs the recorded
+inputs through a real `SDXAgent` backed by `ReplayClient`, which serves the
+recorded responses in order per channel: the main loop, or the planner,
+workers and merge of a parallel request, which call the model concurrently.
+Tools, compaction, checkpoints, session storage and rendering all run for
+real, and the replay writes a trace of its own.
+`compare()` reports per-stage latency, bytes and memory for two traces.
+
+    python traces.py replay traces/trace_<id>.jsonl.gz --workdir fixture/ --out new.jsonl.gz
+    python traces.py compare old.jsonl.gz new.jsonl.gz --threshold 0.10
+"""
+
+import argparse
+import gzip
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import zlib
+from collections import deque
+from dataclasses import fields
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from google.genai import types
+
+from config import Config
+from context_cache import LocalCacheBackend
+from memwatch import rss_bytes
+from trace_channels import MAIN_CHANNEL, current_channel
+
+TRACE_VERSION = 2
+TRACE_SUFFIX = ".jsonl.gz"
+# config fields that are not stored in a trace header
+_PRIVATE_FIELDS = ("gemini_api_key",)
+
+
+def _dumps(record: Dict[str, Any]) -> str:
+    return json.dumps(record, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+class _Stage:
+    """Times one stage; set `.bytes` inside the block to record its size"""
+
+    __slots__ = ("recorder", "name", "bytes", "started")
+
+    def __init__(self, recorder: "TraceRecorder", name: str):
+        self.recorder = recorder
+        self.name = name
+        self.bytes = 0
+
+    def __enter__(self) -> "_Stage":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.recorder._stage_done(self.name, time.perf_counter() - self.started, self.bytes)
+
+
+class TraceRecorder:
+    """Appends request traces to a compressed JSONL file when enabled"""
+
+    def __init__(self, path: Path, config: Optional[Config] = None, enabled: bool = True):
+        self.path = Path(path)
+        self.config = config
+        self.enabled = enabled
+        self._file = None
+        self._request = 0
+        self._started = 0.0
+        # parallel workers write model records concurrently
+        self._lock = threading.Lock()
+
+    def _write(self, record: Dict[str, Any]):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._write_locked(record)
+
+    def _write_locked(self, record: Dict[str, Any]):
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # binary mode so end_request can sync-flush the compressor
+            self._file = gzip.open(self.path, "ab", compresslevel=6)
+            config = {
+                f.name: getattr(self.config, f.name)
+                for f in fields(Config) if f.name not in _PRIVATE_FIELDS
+            } if self.config else {}
+            self._file.write((_dumps({
+                "type": "header", "version": TRACE_VERSION,
+                "created": datetime.now().isoformat(), "config": config,
+            }) + "\n").encode("utf-8"))
+        self._file.write((_dumps(record) + "\n").encode("utf-8"))
+
+    # ------------------------------------------------------------------
+    # Recording hooks
+    # ------------------------------------------------------------------
+
+    def begin_request(self, user_input: str, mode: str = "single"):
+        self._request += 1
+        self._started = time.perf_counter()
+        self._write({"type": "request", "request": self._request, "input": user_input, "mode": mode})
+
+    def stage(self, name: str) -> _Stage:
+        return _Stage(self, name)
+
+    def _stage_done(self, name: str, seconds: float, size: int):
+        self._write({"type": "stage", "request": self._request, "stage": name,
+                     "ms": round(seconds * 1000, 3), "bytes": size})
+
+    def model_response(self, model: str, response: Optional[types.GenerateContentResponse],
+                       seconds: float, error: Optional[Exception] = None):
+        if not self.enabled:
+            return
+        payload = response.model_dump(mode="json", exclude_none=True) if response is not None else None
+        self._write({"type": "model", "request": self._request, "channel": current_channel(),
+                     "model": model, "ms": round(seconds * 1000, 3), "response": payload,
+                     "error": str(error) if error else None})
+        self._stage_done("model", seconds, len(_dumps(payload)) if payload else 0)
+
+    def tool_call(self, name: str, args: Optional[Dict], result: str):
+        self._write({"type": "tool", "request": self._request, "name": name,
+                     "args": dict(args or {}), "result": result})
+
+    def end_request(self):
+        if not self.enabled or not self._request:
+            return
+        traced_peak = tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else 0
+        self._write({"type": "end", "request": self._request,
+                     "ms": round((time.perf_counter() - self._started) * 1000, 3),
+                     "rss": rss_bytes(), "traced_peak": traced_peak})
+        # a sync flush leaves a readable stream even if the process dies later
+        with self._lock:
+            if self._file is not None:
+                self._file.flush(zlib.Z_SYNC_FLUSH)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+# ----------------------------------------------------------------------
+# Reading
+# ----------------------------------------------------------------------
+
+def read_trace(path: Path) -> Iterator[Dict[str, Any]]:
+    """Yield trace records; a trace from a process that died early is read up to its last flush"""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        try:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        except (EOFError, zlib.error, ValueError):
+            return
+
+
+# ----------------------------------------------------------------------
+# Replay
+# ----------------------------------------------------------------------
+
+class ReplayExhausted(RuntimeError):
+    """The build under test asked the model more often than the recorded run did"""
+
+
+Response = Tuple[str, Optional[Dict], Optional[str]]
+
+
+class _ReplayModels:
+    def __init__(self, responses: Dict[str, List[Response]]):
+        self.responses: Dict[str, Deque[Response]] = {
+            channel: deque(recorded) for channel, recorded in responses.items()
+        }
+        self.calls = 0
+        self.model_mismatches = 0
+        self._lock = threading.Lock()
+
+    def remaining(self) -> int:
+        with self._lock:
+            return sum(len(recorded) for recorded in self.responses.values())
+
+    def generate_content(self, *, model: str, contents, config=None) -> types.GenerateContentResponse:
+        channel = current_channel()
+        with self._lock:
+            recorded = self.responses.get(channel)
+            if not recorded:
+                raise ReplayExhausted(f"trace has no response left for model call {self.calls + 1} ({channel})")
+            recorded_model, payload, error = recorded.popleft()
+            self.calls += 1
+            if recorded_model != model:
+                self.model_mismatches += 1
+        if payload is None:
+            raise RuntimeError(f"recorded error: {error}")
+        return types.GenerateContentResponse.model_validate(payload)
+
+
+class ReplayClient:
+    """Stand-in for `genai.Client` that serves the responses recorded in a trace"""
+
+    def __init__(self, responses: Dict[str, List[Response]]):
+        self.models = _ReplayModels(responses)
+        self.caches = LocalCacheBackend()
+
+
+def load_workload(path: Path) -> Tuple[Dict[str, Any], List[Tuple[str, str]], Dict[str, List[Response]]]:
+    """(recorded config, (user input, mode) pairs, model responses in call order per channel)"""
+    config, inputs, responses = {}, [], {}
+    for record in read_trace(path):
+        kind = record["type"]
+        if kind == "header" and not config:
+            config = record.get("config", {})
+        elif kind == "request":
+            inputs.append((record["input"], record.get("mode", "single")))
+        elif kind == "model":
+            responses.setdefault(record.get("channel", MAIN_CHANNEL), []).append(
+                (record["model"], record["response"], record.get("error"))
+            )
+    return config, inputs, responses
+
+
+def replay(trace_path: Path, out_path: Path, workdir: Optional[Path] = None,
+           trace_memory: bool = False) -> Path:
+    """Re-run a recorded workload offline and trace it to out_path"""
+    # main imports this module for TraceRecorder, so import it lazily here
+    import main
+
+    trace_path, out_path = Path(trace_path).resolve(), Path(out_path).resolve()
+    recorded, inputs, responses = load_workload(trace_path)
+    if not inputs:
+        raise ValueError(f"{trace_path} contains no requests")
+
+    known = {f.name for f in fields(Config)}
+    scratch = tempfile.mkdtemp(prefix="sdx_replay_")
+    # tools may write files: replay against a copy so every run starts from the same tree
+    run_dir = os.path.join(scratch, "work")
+    if workdir:
+        shutil.copytree(workdir, run_dir)
+    else:
+        os.makedirs(run_dir)
+    cwd = os.getcwd()
+    try:
+        os.chdir(run_dir)
+        config = Config(**{
+            **{name: value for name, value in recorded.items() if name in known},
+            "gemini_api_key": "replay",
+            "session_dir": os.path.join(scratch, "sessions"),
+            "log_dir": os.path.join(scratch, "logs"),
+            "record_trace": True,
+        })
+        if main.logger is None:
+            main.logger = main.Logger(config.log_dir, log_to_file=False)
+        if trace_memory:
+            tracemalloc.start()
+        client = ReplayClient(responses)
+        agent = main.SDXAgent(config=config, client=client)
+        agent.tracer.path = out_path
+        for user_input, mode in inputs:
+            if mode == "parallel":
+                agent.process_parallel(user_input)
+            else:
+                agent.process_request(user_input)
+        agent.tracer.close()
+        agent.checkpoints.close()
+        if client.models.remaining() or client.models.model_mismatches:
+            main.logger.warning(
+                f"Replay diverged: {client.models.remaining()} recorded responses unused, "
+                f"{client.models.model_mismatches} calls routed to a different model"
+            )
+    finally:
+        if tracemalloc.is_tracing() and trace_memory:
+            tracemalloc.stop()
+        os.chdir(cwd)
+        shutil.rmtree(scratch, ignore_errors=True)
+    return out_path
+
+
+# ----------------------------------------------------------------------
+# Comparison
+# ----------------------------------------------------------------------
+
+def summarize(path: Path) -> Dict[str, Any]:
+    """Per-stage totals and per-run memory/latency for one trace"""
+    stages: Dict[str, Dict[str, float]] = {}
+    requests, total_ms, peak_rss, traced_peak = 0, 0.0, 0, 0
+    for record in read_trace(path):
+        kind = record["type"]
+        if kind == "stage":
+            stage = stages.setdefault(record["stage"], {"count": 0, "ms": 0.0, "bytes": 0})
+            stage["count"] += 1
+            stage["ms"] += record["ms"]
+            stage["bytes"] += record["bytes"]
+        elif kind == "end":
+            requests += 1
+            total_ms += record["ms"]
+            peak_rss = max(peak_rss, record["rss"])
+            traced_peak = max(traced_peak, record.get("traced_peak", 0))
+    return {"stages": stages, "requests": requests, "ms": total_ms,
+            "rss": peak_rss, "traced_peak": traced_peak}
+
+
+def _delta(old: float, new: float) -> str:
+    if not old:
+        return "new" if new else "-"
+    return f"{(new - old) / old:+.1%}"
+
+
+def compare(old_path: Path, new_path: Path, threshold: Optional[float] = None) -> Tuple[str, List[str]]:
+    """Comparison table and the regressions beyond threshold (fraction, e.g. 0.1)"""
+    old, new = summarize(old_path), summarize(new_path)
+    row = "{:<28} {:>13} {:>21} {:>7} {:>23} {:>7}"
+    lines = [row.format("stage", "calls old/new", "total ms old/new", "Δ", "bytes old/new", "Δ")]
+    regressions = []
+    for name in sorted(set(old["stages"]) | set(new["stages"])):
+        a = old["stages"].get(name, {"count": 0, "ms": 0.0, "bytes": 0})
+        b = new["stages"].get(name, {"count": 0, "ms": 0.0, "bytes": 0})
+        lines.append(row.format(
+            name, f"{a['count']}/{b['count']}", f"{a['ms']:.1f}/{b['ms']:.1f}", _delta(a['ms'], b['ms']),
+            f"{a['bytes']}/{b['bytes']}", _delta(a['bytes'], b['bytes']),
+        ))
+        # model stages measure the network in recorded runs and nothing in replays
+        if threshold is not None and not name.startswith("model") and a["ms"] \
+                and (b["ms"] - a["ms"]) / a["ms"] > threshold:
+            regressions.append(f"{name}: {a['ms']:.1f} -> {b['ms']:.1f} ms")
+
+    lines.append("")
+    lines.append(row.format("requests", f"{old['requests']}/{new['requests']}", "", "", "", "").rstrip())
+    lines.append(row.format(
+        "request wall time (ms)", "", f"{old['ms']:.1f}/{new['ms']:.1f}", _delta(old['ms'], new['ms']), "", "",
+    ).rstrip())
+    for key, label in (("rss", "peak RSS (MB)"), ("traced_peak", "tracemalloc peak (MB)")):
+        a, b = old[key] / 2**20, new[key] / 2**20
+        lines.append(row.format(label, "", f"{a:.1f}/{b:.1f}", _delta(a, b), "", "").rstrip())
+        if threshold is not None and key == "rss" and a and (b - a) / a > threshold:
+            regressions.append(f"{label}: {a:.1f} -> {b:.1f}")
+    return "\n".join(lines), regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay and compare SDX Agent traces")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    replay_parser = commands.add_parser("replay", help="re-run a recorded trace offline")
+    replay_parser.add_argument("trace")
+    replay_parser.add_argument("--workdir", help="directory the tools run against (copied first)")
+    replay_parser.add_argument("--out", help="trace file for the replay run")
+    replay_parser.add_argument("--trace-memory", action="store_true", help="record tracemalloc peaks")
+
+    compare_parser = commands.add_parser("compare", help="per-stage latency, bytes and memory of two traces")
+    compare_parser.add_argument("old")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--threshold", type=float,
+                                help="exit 1 if a stage or peak RSS regresses by more than this fraction")
+
+    args = parser.parse_args()
+    if args.command == "replay":
+        out = args.out or args.trace.replace(TRACE_SUFFIX, "") + f".replay{TRACE_SUFFIX}"
+        path = replay(Path(args.trace), Path(out), Path(args.workdir) if args.workdir else None,
+                      trace_memory=args.trace_memory)
+        print(f"Replay trace written to {path}")
+        return
+    report, regressions = compare(Path(args.old), Path(args.new), args.threshold)
+    print(report)
+    if regressions:
+        print("\nRegressions over threshold:\n  " + "\n  ".join(regressions))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()